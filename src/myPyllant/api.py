@@ -1,18 +1,31 @@
 from __future__ import annotations
 
+import asyncio
+import copy
 import datetime
+import functools
 import json
 import logging
 import re
-from collections.abc import AsyncIterator
-from dataclasses import asdict
+from collections.abc import AsyncIterator, Awaitable, Iterable
+from dataclasses import asdict, dataclass
 from html import unescape
 from typing import Any
 from urllib.parse import parse_qs, urlencode, urlparse
 from zoneinfo import ZoneInfo
 
-from aiohttp import ClientResponseError
-
+from aiohttp import BaseConnector, ClientError, ClientResponseError, ClientSession
+
+from myPyllant.cache import MISSING, MetaInfoStore, ResponseCache
+from myPyllant.token_store import TokenStore
+from myPyllant.writes import WriteOperation, WriteResult, apply_writes
+from myPyllant.tracing import (
+    Tracer,
+    get_span_attributes,
+    set_span_attribute,
+    start_span,
+    traced,
+)
 from myPyllant.const import (
     API_URL_BASE,
     AUTHENTICATE_URL,
@@ -20,9 +33,13 @@ from myPyllant.const import (
     CLIENT_ID,
     COUNTRIES,
     DEFAULT_CONTROL_IDENTIFIER,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
     DEFAULT_QUICK_VETO_DURATION,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_TOKEN_REFRESH_MARGIN,
     LOGIN_URL,
     SYSTEM_CONTROL_API_URL_BASE,
+    TOKEN_REFRESH_RETRY_DELAY,
     TOKEN_URL,
 )
 from myPyllant.enums import (
@@ -42,12 +59,21 @@ from myPyllant.enums import (
 )
 from myPyllant.http_client import (
     AuthenticationFailed,
+    CircuitBreaker,
+    CircuitOpenError,
+    ConnectionPoolConfig,
+    DebugTracing,
     LoginEndpointInvalid,
+    RateLimiter,
     RealmInvalid,
+    RetryPolicy,
     get_http_client,
+    is_transient_error,
     CountingClientSession,
 )
+from myPyllant.metrics import get_endpoint_template
 from myPyllant.models import (
+    BaseTimeProgram,
     Device,
     DeviceData,
     DHWTimeProgram,
@@ -66,6 +92,7 @@ from myPyllant.utils import (
     datetime_format,
     dict_to_camel_case,
     dict_to_snake_case,
+    gather_limited,
     generate_code,
     get_realm,
     get_default_holiday_dates,
@@ -74,6 +101,50 @@ from myPyllant.utils import (
 logger = logging.getLogger(__name__)
 
 
+# Errors after which optional endpoints return empty data instead of failing the whole system
+OPTIONAL_ENDPOINT_ERRORS = (ClientError, asyncio.TimeoutError, CircuitOpenError)
+
+# Values that idempotent writes compare, by model
+IDEMPOTENT_WRITE_ATTRIBUTES: dict[type, tuple[str, ...]] = {
+    Zone: (
+        "heating.operation_mode_heating",
+        "heating.manual_mode_setpoint_heating",
+        "heating.set_back_temperature",
+        "heating.time_program_heating",
+        "cooling.operation_mode_cooling",
+        "cooling.manual_mode_setpoint_cooling",
+        "cooling.setpoint_cooling",
+        "cooling.time_program_cooling",
+    ),
+    DomesticHotWater: (
+        "tapping_setpoint",
+        "operation_mode_dhw",
+        "time_program_dhw",
+        "time_program_circulation_pump",
+    ),
+    Ventilation: (
+        "operation_mode_ventilation",
+        "maximum_day_fan_stage",
+        "maximum_night_fan_stage",
+    ),
+    AmbisenseRoom: (
+        "room_configuration.operation_mode",
+        "room_configuration.temperature_setpoint",
+        "time_program",
+    ),
+    Circuit: (
+        "heating_curve",
+        "heat_demand_limited_by_outside_temperature",
+        "heating_flow_temperature_minimum_setpoint",
+    ),
+}
+
+
+def _get_written_value_key(target: Any, attribute: str) -> tuple:
+    index = getattr(target, "index", getattr(target, "room_index", None))
+    return (type(target).__name__, target.system_id, index, attribute)
+
+
 class AmbisenseNoFacilityError(Exception):
     """Raised when the API returns NO_FACILITY_FOR_SYSTEM_ID for an ambisense endpoint."""
 
@@ -106,6 +177,35 @@ def get_system_api_base(
             return f"{get_api_base(control_identifier)}/systems/{get_system_id(system)}"
 
 
+@dataclass(frozen=True)
+class SystemEndpoints:
+    """
+    URL bases of a system, resolved once from its control identifier
+
+    Parameters:
+        system_id: The system ID
+        control_identifier: The control identifier the URLs were resolved with
+        api_base: Base URL of the API for this control identifier
+        system_api_base: Base URL of the system, i.e. `.../systems/{system_id}/tli`
+    """
+
+    system_id: str
+    control_identifier: ControlIdentifier
+    api_base: str | None
+    system_api_base: str | None
+
+    @classmethod
+    def resolve(
+        cls, system_id: str, control_identifier: ControlIdentifier
+    ) -> SystemEndpoints:
+        return cls(
+            system_id=system_id,
+            control_identifier=control_identifier,
+            api_base=get_api_base(control_identifier),
+            system_api_base=get_system_api_base(system_id, control_identifier),
+        )
+
+
 class MyPyllantAPI:
     username: str
     password: str
@@ -114,8 +214,50 @@ class MyPyllantAPI:
     oauth_session_expires: datetime.datetime | None = None
 
     def __init__(
-        self, username: str, password: str, brand: str, country: str | None = None
+        self,
+        username: str,
+        password: str,
+        brand: str,
+        country: str | None = None,
+        pool_config: ConnectionPoolConfig | None = None,
+        rate_limit: float | None = DEFAULT_RATE_LIMIT,
+        retry_policy: RetryPolicy = RetryPolicy(),
+        circuit_breakers: dict[str, CircuitBreaker] | None = None,
+        response_cache: ResponseCache | None = None,
+        meta_info_store: MetaInfoStore | None = None,
+        auto_refresh_token: bool = False,
+        token_refresh_margin: float = DEFAULT_TOKEN_REFRESH_MARGIN,
+        token_store: TokenStore | None = None,
+        session: ClientSession | None = None,
+        connector: BaseConnector | None = None,
+        debug_tracing: DebugTracing | None = None,
+        tracer: Tracer | None = None,
+        idempotent_writes: bool = False,
     ) -> None:
+        """
+        Parameters:
+            username: Username (email address) for the myVaillant app
+            password: Password for the myVaillant app
+            brand: Brand the account is registered in, i.e. 'vaillant'
+            country: Country the account is registered in, i.e. 'germany'
+            pool_config: Connection pool and timeout settings, see `SINGLE_HOME_POOL` and `FLEET_POLLING_POOL`
+            rate_limit: Maximum requests per second, lowered automatically when the API throttles. None to disable
+            retry_policy: When to retry requests that failed with a transient error
+            circuit_breakers: Circuit breakers by endpoint family (rts, mpc, eebus, ambisense), created on first use if missing
+            response_cache: Caches responses of slow-changing endpoints, i.e. `MemoryResponseCache()`
+            meta_info_store: Persists control identifiers and time zones across restarts, i.e. `JSONMetaInfoStore()`
+            auto_refresh_token: Refresh the access token in the background while used as a context manager
+            token_refresh_margin: Seconds before the access token expires when it gets refreshed
+            token_store: Persists the OAuth session, so the next start can skip logging in, i.e. `FileTokenStore()`
+            session: An existing aiohttp session to share connections with. Only its connector (and timeout) is used,
+                cookies and authentication stay separate. Closing the API never closes it
+            connector: An existing aiohttp connector to share connections with, closing the API never closes it
+            debug_tracing: Sampling and body truncation of DEBUG request logs, see `DebugTracing`
+            tracer: An OpenTelemetry compatible tracer, i.e. `opentelemetry.trace.get_tracer("myPyllant")`.
+                Fetching a system, device data, `set_*` methods and HTTP requests are traced as spans
+            idempotent_writes: Skip `set_*` requests when the value is the same as when the system was fetched,
+                or when it was last written
+        """
         if brand not in BRANDS.keys():
             raise ValueError(
                 f"Invalid brand, must be one of {', '.join(BRANDS.keys())}"
@@ -133,20 +275,68 @@ class MyPyllantAPI:
         self.password = password
         self.country = country
         self.brand = brand
-        self.control_identifiers: dict[str, str] = {}
-        self.time_zones: dict[str, str] = {}
-
-        self.aiohttp_session = get_http_client()
+        self.meta_info_store = meta_info_store
+        self.control_identifiers: dict[str, str] = (
+            meta_info_store.load("control_identifiers") if meta_info_store else {}
+        )
+        self.time_zones: dict[str, str] = (
+            meta_info_store.load("time_zones") if meta_info_store else {}
+        )
+        self.retry_policy = retry_policy
+        self.circuit_breakers = circuit_breakers or {}
+        self._in_flight_requests: dict[tuple, asyncio.Future] = {}
+        self.response_cache = response_cache
+        self.coalesced_request_count = 0
+        self.auto_refresh_token = auto_refresh_token
+        self.token_refresh_margin = token_refresh_margin
+        self.token_refresh_count = 0
+        self._token_lock = asyncio.Lock()
+        self._token_refresh_task: asyncio.Task | None = None
+        self.token_store = token_store
+        self.unauthorized_replay_count = 0
+        self.tracer = tracer
+        self.idempotent_writes = idempotent_writes
+        self.skipped_write_count = 0
+        self._written_values: dict[tuple, Any] = {}
+        self._system_endpoints: dict[str, SystemEndpoints] = {}
+        self._authorized_headers: tuple[str, dict[str, str]] | None = None
+
+        http_client_kwargs: dict[str, Any] = {}
+        if session is not None:
+            if connector is not None:
+                raise ValueError("Pass either session or connector, not both")
+            if session.closed or session.connector is None:
+                raise ValueError("Can't share the connector of a closed session")
+            connector = session.connector
+            http_client_kwargs["timeout"] = session.timeout
+        if connector is not None:
+            # The owner of the connector is responsible for closing it
+            http_client_kwargs["connector"] = connector
+            http_client_kwargs["connector_owner"] = False
+            if pool_config:
+                http_client_kwargs["timeout"] = pool_config.create_timeout()
+                pool_config = None
+
+        self.aiohttp_session = get_http_client(
+            pool_config=pool_config,
+            debug_tracing=debug_tracing,
+            rate_limiter=RateLimiter(rate=rate_limit) if rate_limit else None,
+            **http_client_kwargs,
+        )
 
     async def __aenter__(self) -> MyPyllantAPI:
         try:
-            await self.login()
+            if not await self.resume_session():
+                await self.login()
         except Exception:
             await self.aiohttp_session.close()
             raise
+        if self.auto_refresh_token:
+            self.start_token_refresh()
         return self
 
     async def __aexit__(self, *args, **kwargs) -> None:
+        await self.stop_token_refresh()
         if not self.aiohttp_session.closed:
             await self.aiohttp_session.close()
 
@@ -155,6 +345,7 @@ class MyPyllantAPI:
         self.oauth_session = await self.get_token(code, code_verifier)
         logger.debug("Got session %s", self.oauth_session)
         self.set_session_expires()
+        self.save_session()
 
     async def get_code(self):
         """
@@ -250,35 +441,333 @@ class MyPyllantAPI:
         logger.debug("Session expires in %s", self.oauth_session_expires)
 
     async def refresh_token(self):
-        refresh_payload = {
-            "refresh_token": self.oauth_session["refresh_token"],
-            "client_id": CLIENT_ID,
-            "grant_type": "refresh_token",
+        """
+        Refreshes the access token, only one refresh runs at a time
+
+        Callers that were waiting for another refresh get its result instead of refreshing again.
+        Requests don't wait for the refresh and keep using the current access token until it's replaced.
+        """
+        oauth_session = self.oauth_session
+        async with self._token_lock:
+            if self.oauth_session is not oauth_session:
+                # Another caller refreshed the token while we were waiting
+                return self.oauth_session
+            refresh_payload = {
+                "refresh_token": self.oauth_session["refresh_token"],
+                "client_id": CLIENT_ID,
+                "grant_type": "refresh_token",
+            }
+            async with self.aiohttp_session.post(
+                TOKEN_URL.format(realm=get_realm(self.brand, self.country)),
+                data=refresh_payload,
+            ) as resp:
+                self.oauth_session = await resp.json()
+                self.set_session_expires()
+                self.save_session()
+                self.token_refresh_count += 1
+                return self.oauth_session
+
+    def export_session(self) -> dict[str, Any]:
+        """
+        Returns the OAuth session and its expiry as a JSON serializable dict, see `import_session()`
+        """
+        return {
+            "oauth_session": dict(self.oauth_session),
+            "oauth_session_expires": self.oauth_session_expires.isoformat()
+            if self.oauth_session_expires
+            else None,
         }
-        async with self.aiohttp_session.post(
-            TOKEN_URL.format(realm=get_realm(self.brand, self.country)),
-            data=refresh_payload,
-        ) as resp:
-            self.oauth_session = await resp.json()
-            self.set_session_expires()
-            return self.oauth_session
+
+    def import_session(self, session: dict[str, Any]):
+        """
+        Restores an OAuth session from `export_session()`
+
+        Parameters:
+            session: The dict returned by `export_session()`
+        """
+        self.oauth_session = dict(session["oauth_session"])
+        expires = session.get("oauth_session_expires")
+        self.oauth_session_expires = (
+            datetime.datetime.fromisoformat(expires) if expires else None
+        )
+
+    def save_session(self):
+        if self.token_store:
+            self.token_store.save(self.username, self.export_session())
+
+    async def resume_session(self) -> bool:
+        """
+        Restores the session from the token store and refreshes it if the access token is about to expire
+
+        Returns False if there's no usable session, and `login()` is needed
+        """
+        if not self.token_store:
+            return False
+        session = self.token_store.load(self.username)
+        if not session:
+            return False
+        try:
+            self.import_session(session)
+        except (KeyError, TypeError, ValueError):
+            logger.warning("Ignoring invalid stored session", exc_info=True)
+            return False
+        if (
+            self.oauth_session_expires
+            and self.oauth_session_expires
+            > datetime.datetime.now(datetime.timezone.utc)
+            + datetime.timedelta(seconds=self.token_refresh_margin)
+        ):
+            logger.debug("Resumed session, expires %s", self.oauth_session_expires)
+            return True
+        try:
+            await self.refresh_token()
+        except (ClientError, asyncio.TimeoutError, KeyError, ValueError):
+            logger.debug("Couldn't refresh stored session", exc_info=True)
+            self.token_store.clear(self.username)
+            return False
+        logger.debug("Resumed and refreshed session")
+        return True
+
+    def get_token_refresh_delay(self) -> float:
+        """
+        Seconds until the access token should be refreshed, `token_refresh_margin` before it expires
+        """
+        if not self.oauth_session_expires:
+            return 0.0
+        remaining = (
+            self.oauth_session_expires - datetime.datetime.now(datetime.timezone.utc)
+        ).total_seconds()
+        # Waiting at least half the remaining time prevents a refresh loop with short-lived tokens
+        return max(remaining - self.token_refresh_margin, remaining / 2, 0.0)
+
+    def start_token_refresh(self) -> asyncio.Task:
+        """
+        Starts refreshing the access token in the background, stopped by `stop_token_refresh()`
+        """
+        if not self._token_refresh_task or self._token_refresh_task.done():
+            self._token_refresh_task = asyncio.create_task(self._refresh_token_loop())
+        return self._token_refresh_task
+
+    async def stop_token_refresh(self):
+        if self._token_refresh_task:
+            self._token_refresh_task.cancel()
+            try:
+                await self._token_refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._token_refresh_task = None
+
+    async def _refresh_token_loop(self):
+        while True:
+            await asyncio.sleep(self.get_token_refresh_delay())
+            try:
+                await self.renew_token()
+            except Exception:
+                # get_token() raises a bare Exception, and the loop must keep running
+                logger.warning(
+                    "Couldn't renew token, retrying in %ss",
+                    TOKEN_REFRESH_RETRY_DELAY,
+                    exc_info=True,
+                )
+                await asyncio.sleep(TOKEN_REFRESH_RETRY_DELAY)
+
+    async def renew_token(self, oauth_session: dict | None = None):
+        """
+        Refreshes the access token, and logs in again if the refresh token isn't valid anymore
+
+        Parameters:
+            oauth_session: The session that should be renewed, nothing happens if another caller already replaced it
+        """
+        if oauth_session is None:
+            oauth_session = self.oauth_session
+        if self.oauth_session is not oauth_session:
+            return
+        try:
+            await self.refresh_token()
+        except (ClientError, asyncio.TimeoutError, KeyError, ValueError):
+            logger.warning("Couldn't refresh token, logging in again", exc_info=True)
+            async with self._token_lock:
+                if self.oauth_session is oauth_session:
+                    await self.login()
 
     @property
     def access_token(self):
         return self.oauth_session["access_token"]
 
-    def get_authorized_headers(self):
-        return {
-            "Authorization": "Bearer " + self.access_token,
-            "x-app-identifier": "VAILLANT",
-            "Accept-Language": "en-GB",
-            "Accept": "application/json, text/plain, */*",
-            "x-client-locale": "en-GB",
-            "x-idm-identifier": "KEYCLOAK",
-            "ocp-apim-subscription-key": "1e0a2f3511fb4c5bbb1c7f9fedd20b1c",
-            "User-Agent": "okhttp/4.9.2",
-            "Connection": "keep-alive",
+    def get_authorized_headers(self) -> dict[str, str]:
+        """
+        Returns a copy of the headers for API requests, they are only built again when the access token changes
+        """
+        access_token = self.access_token
+        if not self._authorized_headers or self._authorized_headers[0] != access_token:
+            self._authorized_headers = (
+                access_token,
+                {
+                    "Authorization": "Bearer " + access_token,
+                    "x-app-identifier": "VAILLANT",
+                    "Accept-Language": "en-GB",
+                    "Accept": "application/json, text/plain, */*",
+                    "x-client-locale": "en-GB",
+                    "x-idm-identifier": "KEYCLOAK",
+                    "ocp-apim-subscription-key": "1e0a2f3511fb4c5bbb1c7f9fedd20b1c",
+                    "User-Agent": "okhttp/4.9.2",
+                    "Connection": "keep-alive",
+                },
+            )
+        return dict(self._authorized_headers[1])
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        response_type: str | None = None,
+        endpoint: str | None = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Sends an authorized request to the API
+
+        The response body is always read, so the connection goes back to the pool
+        and can be reused by the next request. Requests that fail with a transient
+        error are retried according to `retry_policy`.
+
+        Identical GET requests that are sent while another one is still in flight
+        share its response instead of sending their own. GET responses are cached
+        if `response_cache` is set and has a TTL for the URL.
+
+        Parameters:
+            method: The HTTP method, i.e. GET or PATCH
+            url: The full URL
+            response_type: `json` or `text` to return the response body, None to discard it
+            endpoint: Name of the endpoint family (i.e. `mpc`), requests fail fast while its circuit breaker is open
+            kwargs: Passed on to `aiohttp.ClientSession.request()`
+        """
+        if method.upper() != "GET" or kwargs:
+            return await self._send_request_with_retries(
+                method, url, response_type, endpoint, **kwargs
+            )
+
+        cache_ttl = self.response_cache.get_ttl(url) if self.response_cache else 0
+        cache_key = f"{self.username}:{response_type}:{url}"
+        if self.response_cache and cache_ttl:
+            cached = await self.response_cache.get(cache_key)
+            if cached is not MISSING:
+                return cached
+
+        key = (url, response_type, self.access_token)
+        in_flight = self._in_flight_requests.get(key)
+        if in_flight:
+            self.coalesced_request_count += 1
+            return copy.deepcopy(await asyncio.shield(in_flight))
+
+        async def send_request() -> Any:
+            result = await self._send_request_with_retries(
+                method, url, response_type, endpoint
+            )
+            if self.response_cache and cache_ttl:
+                await self.response_cache.set(cache_key, result, cache_ttl)
+            return result
+
+        task = asyncio.ensure_future(send_request())
+        self._in_flight_requests[key] = task
+
+        def remove_in_flight(_):
+            if self._in_flight_requests.get(key) is task:
+                del self._in_flight_requests[key]
+
+        task.add_done_callback(remove_in_flight)
+        return await asyncio.shield(task)
+
+    async def _send_request_with_retries(
+        self,
+        method: str,
+        url: str,
+        response_type: str | None = None,
+        endpoint: str | None = None,
+        **kwargs,
+    ) -> Any:
+        circuit_breaker = self.get_circuit_breaker(endpoint) if endpoint else None
+        attempt = 1
+        replayed = False
+        while True:
+            if circuit_breaker:
+                circuit_breaker.check(str(endpoint))
+            oauth_session = self.oauth_session
+            try:
+                result = await self._send_request(
+                    method, url, response_type, endpoint, attempt, **kwargs
+                )
+            except (ClientError, asyncio.TimeoutError) as e:
+                if (
+                    isinstance(e, ClientResponseError)
+                    and e.status == 401
+                    and not replayed
+                ):
+                    # Concurrent callers that failed with the same token share one renewal
+                    logger.debug("Renewing token and replaying %s %s", method, url)
+                    await self.renew_token(oauth_session)
+                    self.unauthorized_replay_count += 1
+                    self._record_retry(method, url)
+                    replayed = True
+                    continue
+                if circuit_breaker and is_transient_error(e):
+                    circuit_breaker.record_failure()
+                if not self.retry_policy.should_retry(method, attempt, e):
+                    raise
+                delay = self.retry_policy.get_delay(attempt, e)
+                logger.debug("Retrying %s %s in %.2fs after %r", method, url, delay, e)
+                self._record_retry(method, url)
+                await asyncio.sleep(delay)
+                attempt += 1
+            else:
+                if circuit_breaker:
+                    circuit_breaker.record_success()
+                return result
+
+    async def _send_request(
+        self,
+        method: str,
+        url: str,
+        response_type: str | None = None,
+        endpoint: str | None = None,
+        attempt: int = 1,
+        **kwargs,
+    ) -> Any:
+        kwargs.setdefault("headers", self.get_authorized_headers())
+        attributes = {
+            "http.request.method": method,
+            "url.template": get_endpoint_template(url),
+            "mypyllant.endpoint": endpoint,
+            "mypyllant.attempt": attempt,
         }
+        with start_span(self.tracer, f"HTTP {method}", attributes) as span:
+            try:
+                async with self.aiohttp_session.request(
+                    method, url, **kwargs
+                ) as response:
+                    set_span_attribute(
+                        span, "http.response.status_code", response.status
+                    )
+                    match response_type:
+                        case "json":
+                            return await response.json()
+                        case "text":
+                            return await response.text()
+                        case _:
+                            await response.read()
+                            return None
+            except ClientResponseError as e:
+                set_span_attribute(span, "http.response.status_code", e.status)
+                raise
+
+    def _record_retry(self, method: str, url: str):
+        if self.aiohttp_session.metrics:
+            self.aiohttp_session.metrics.record_retry(method, url)
+
+    def get_circuit_breaker(self, endpoint: str) -> CircuitBreaker:
+        if endpoint not in self.circuit_breakers:
+            self.circuit_breakers[endpoint] = CircuitBreaker()
+        return self.circuit_breakers[endpoint]
 
     async def get_api_base(
         self,
@@ -295,28 +784,69 @@ class MyPyllantAPI:
         control_identifier: ControlIdentifier | str | None = None,
     ) -> str | None:
         if not control_identifier:
-            control_identifier = await self.get_control_identifier(system)
+            return (await self.get_system_endpoints(system)).system_api_base
         return get_system_api_base(system, control_identifier)
 
-    async def get_homes(self) -> AsyncIterator[Home]:
+    async def get_system_endpoints(self, system: str | System) -> SystemEndpoints:
+        """
+        Returns the URL bases of a system, resolved once per system and control identifier
+
+        Parameters:
+            system: The System object or system ID string
+        """
+        system_id = get_system_id(system)
+        endpoints = self._system_endpoints.get(system_id)
+        if endpoints and endpoints.control_identifier == self.control_identifiers.get(
+            system_id
+        ):
+            return endpoints
+        endpoints = SystemEndpoints.resolve(
+            system_id, await self.get_control_identifier(system_id)
+        )
+        # A default control identifier is used if it couldn't be fetched, that one shouldn't stick
+        if system_id in self.control_identifiers:
+            self._system_endpoints[system_id] = endpoints
+        return endpoints
+
+    async def get_homes(
+        self,
+        prefetch_control_identifiers: bool = False,
+        max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+    ) -> AsyncIterator[Home]:
         """
         Returns configured homes and their system IDs
 
+        Time zones of all homes are fetched concurrently before the first home is returned.
+
+        Parameters:
+            prefetch_control_identifiers: Also fetch the control identifiers of all homes concurrently
+            max_concurrent_requests: How many meta-info requests are sent at the same time
+
         Returns:
             An Async Iterator with all the configured `Home` objects for the logged-in user
         """
-        async with self.aiohttp_session.get(
-            f"{await self.get_api_base()}/homes", headers=self.get_authorized_headers()
-        ) as homes_resp:
-            for home_json in dict_to_snake_case(await homes_resp.json()):
-                if "system_id" not in home_json or not home_json["system_id"]:
-                    logger.warning(
-                        "Skipping home because system_id is missing or empty: %s",
-                        home_json,
-                    )
-                    continue
-                timezone = await self.get_time_zone(home_json["system_id"])
-                yield Home.from_api(timezone=timezone, **home_json)
+        homes_json = dict_to_snake_case(
+            await self._request("GET", f"{get_api_base()}/homes", response_type="json")
+        )
+
+        valid_homes_json = []
+        for home_json in homes_json:
+            if "system_id" not in home_json or not home_json["system_id"]:
+                logger.warning(
+                    "Skipping home because system_id is missing or empty: %s",
+                    home_json,
+                )
+                continue
+            valid_homes_json.append(home_json)
+
+        system_ids = [h["system_id"] for h in valid_homes_json]
+        requests: list[Awaitable] = [self.get_time_zone(s) for s in system_ids]
+        if prefetch_control_identifiers:
+            requests += [self.get_control_identifier(s) for s in system_ids]
+        results = await gather_limited(requests, limit=max_concurrent_requests)
+
+        for home_json, timezone in zip(valid_homes_json, results):
+            yield Home.from_api(timezone=timezone, **home_json)
 
     async def get_systems(
         self,
@@ -329,6 +859,9 @@ class MyPyllantAPI:
         include_eebus: bool = False,
         include_ambisense_capability: bool = False,
         homes: list[Home] | None = None,
+        max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+        max_concurrent_homes: int = 1,
+        as_completed: bool = False,
     ) -> AsyncIterator[System]:
         """
         Returns an async generator of systems under control of the user
@@ -343,6 +876,9 @@ class MyPyllantAPI:
             include_eebus: Fetches eebus information
             include_ambisense_capability: Fetches eebus information
             homes: Use this list of Home objects instead of fetching them
+            max_concurrent_requests: How many requests are sent at the same time for each system
+            max_concurrent_homes: How many systems are fetched at the same time
+            as_completed: Yield systems as soon as they are fetched, instead of in the order of homes
 
         Returns:
             An Async Iterator with all the `System` objects
@@ -350,77 +886,215 @@ class MyPyllantAPI:
         Examples:
             >>> async for system in MyPyllantAPI(**kwargs).get_systems():
             >>>    print(system.water_pressure)
+            >>> async for system in MyPyllantAPI(**kwargs).get_systems(max_concurrent_homes=4, as_completed=True):
+            >>>    print(system.water_pressure)
         """
         if not homes:
-            homes = [home async for home in self.get_homes()]
-        no_facility_error: AmbisenseNoFacilityError | None = None
-        for home in homes:
-            control_identifier = await self.get_control_identifier(home.system_id)
-            if control_identifier.is_unsupported:
-                continue
-            system_url = await self.get_system_api_base(home.system_id)
-            assert (
-                system_url is not None
-            )  # guaranteed: unsupported systems are skipped above
-            current_system_url = (
-                f"{await self.get_api_base()}/emf/v2/{home.system_id}/currentSystem"
+            homes = [
+                home
+                async for home in self.get_homes(
+                    prefetch_control_identifiers=True,
+                    max_concurrent_requests=max_concurrent_requests,
+                )
+            ]
+        no_facility_errors: list[AmbisenseNoFacilityError] = []
+
+        def get_system(home: Home) -> Awaitable[System | None]:
+            return self._get_system(
+                home,
+                no_facility_errors,
+                max_concurrent_requests=max_concurrent_requests,
+                include_connection_status=include_connection_status,
+                include_diagnostic_trouble_codes=include_diagnostic_trouble_codes,
+                include_rts=include_rts,
+                include_mpc=include_mpc,
+                include_ambisense_rooms=include_ambisense_rooms,
+                include_energy_management=include_energy_management,
+                include_eebus=include_eebus,
+                include_ambisense_capability=include_ambisense_capability,
             )
 
-            async with self.aiohttp_session.get(
-                system_url, headers=self.get_authorized_headers()
-            ) as system_resp:
-                system_raw = await system_resp.text()
-                if control_identifier.is_vrc700:
-                    system_raw = system_raw.replace("domesticHotWater", "dhw")
-                    system_raw = system_raw.replace("DomesticHotWater", "Dhw")
-                system_json = dict_to_snake_case(json.loads(system_raw))
+        if max_concurrent_homes <= 1 and not as_completed:
+            for home in homes:
+                system = await get_system(home)
+                if system is not None:
+                    yield system
+        else:
+            semaphore = asyncio.Semaphore(max(max_concurrent_homes, 1))
 
-            async with self.aiohttp_session.get(
-                current_system_url, headers=self.get_authorized_headers()
-            ) as current_system_resp:
-                current_system_json = await current_system_resp.json()
+            async def get_system_limited(home: Home) -> System | None:
+                async with semaphore:
+                    return await get_system(home)
+
+            tasks = [asyncio.ensure_future(get_system_limited(h)) for h in homes]
+            try:
+                for task in asyncio.as_completed(tasks) if as_completed else tasks:
+                    system = await task
+                    if system is not None:
+                        yield system
+            finally:
+                # Don't leave requests running if the caller stops iterating early
+                for task in tasks:
+                    task.cancel()
+
+        if no_facility_errors:
+            logger.warning(
+                "Ambisense rooms not available for one or more systems (%s), "
+                "consider disabling the Ambisense rooms option",
+                no_facility_errors[-1],
+            )
+
+    async def _get_system_json(self, endpoints: SystemEndpoints) -> dict:
+        """
+        Returns configuration, state and properties of a system
+        """
+        # guaranteed: unsupported systems aren't requested
+        assert endpoints.system_api_base is not None
+        system_raw = await self._request(
+            "GET", endpoints.system_api_base, response_type="text"
+        )
+        if endpoints.control_identifier.is_vrc700:
+            system_raw = system_raw.replace("domesticHotWater", "dhw")
+            system_raw = system_raw.replace("DomesticHotWater", "Dhw")
+        return dict_to_snake_case(json.loads(system_raw))
+
+    async def _get_current_system_json(self, system_id: str) -> dict:
+        url = f"{get_api_base()}/emf/v2/{system_id}/currentSystem"
+        return dict_to_snake_case(await self._request("GET", url, response_type="json"))
+
+    async def refresh_state(
+        self, system: System, include_mpc: bool | None = None
+    ) -> System:
+        """
+        Updates the state of an existing system in place, i.e. temperatures, special functions and devices
+
+        Only the state gets parsed, the configuration (including time programs) and optional data like
+        ambisense rooms or rts stay as they are. Refresh them with `get_systems()` on a slower schedule,
+        like the `configuration` interval of `PollingCoordinator`.
+        There's no state-only endpoint, so the system document is still requested.
 
-            ambisense_rooms = []
+        Parameters:
+            system: A system from `get_systems()`
+            include_mpc: Also refresh the current power consumption, defaults to whether the system has it
+
+        Returns:
+            The same system
+        """
+        if include_mpc is None:
+            include_mpc = system.mpc is not None
+        with start_span(
+            self.tracer, "mypyllant.refresh_state", get_span_attributes(system)
+        ):
+            endpoints = await self.get_system_endpoints(system)
+            requests: dict[str, Awaitable] = {
+                "system": self._get_system_json(endpoints),
+                "current_system": self._get_current_system_json(system.id),
+            }
+            if include_mpc:
+                requests["mpc"] = self.get_mpc(system.id)
+            responses = dict(
+                zip(requests.keys(), await asyncio.gather(*requests.values()))
+            )
+            system_json = responses["system"]
+            system.update_state(
+                state=system_json.get("state", {}),
+                properties=system_json.get("properties", {}),
+                current_system=responses["current_system"],
+                mpc=responses.get("mpc"),
+            )
+        return system
+
+    async def _get_system(
+        self,
+        home: Home,
+        no_facility_errors: list[AmbisenseNoFacilityError],
+        max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+        include_connection_status: bool = False,
+        include_diagnostic_trouble_codes: bool = False,
+        include_rts: bool = False,
+        include_mpc: bool = False,
+        include_ambisense_rooms: bool = False,
+        include_energy_management: bool = False,
+        include_eebus: bool = False,
+        include_ambisense_capability: bool = False,
+    ) -> System | None:
+        """
+        Fetches a single system, issuing all independent requests concurrently
+
+        The control identifier is needed to build the system URL, so it's requested first.
+        Everything else (system, currentSystem and the optional endpoints) runs at the same time,
+        limited to `max_concurrent_requests` requests in flight.
+
+        Returns None if the system's controller is unsupported
+        """
+        attributes = {"mypyllant.system_id": home.system_id}
+        with start_span(self.tracer, "mypyllant.get_system", attributes) as span:
+            endpoints = await self.get_system_endpoints(home.system_id)
+            control_identifier = endpoints.control_identifier
+            set_span_attribute(
+                span, "mypyllant.control_identifier", str(control_identifier)
+            )
+            if control_identifier.is_unsupported:
+                return None
+            requests: dict[str, Awaitable] = {
+                "system": self._get_system_json(endpoints),
+                "current_system": self._get_current_system_json(home.system_id),
+            }
+            if include_connection_status:
+                requests["connected"] = self.get_connection_status(home.system_id)
+            if include_diagnostic_trouble_codes:
+                requests["diagnostic_trouble_codes"] = (
+                    self.get_diagnostic_trouble_codes(home.system_id)
+                )
+            if include_rts:
+                requests["rts"] = self.get_rts(home.system_id)
+            if include_mpc:
+                requests["mpc"] = self.get_mpc(home.system_id)
+            if include_ambisense_capability:
+                requests["ambisense_capability"] = self.get_ambisense_capability(
+                    home.system_id
+                )
             if include_ambisense_rooms:
-                try:
-                    ambisense_rooms = await self.get_ambisense_rooms(home.system_id)
-                except AmbisenseNoFacilityError as e:
-                    no_facility_error = e
+                requests["ambisense_rooms"] = self.get_ambisense_rooms(home.system_id)
+            if include_energy_management:
+                requests["energy_management"] = self.get_energy_management(
+                    home.system_id
+                )
+            if include_eebus:
+                requests["eebus"] = self.get_eebus(home.system_id)
 
+            results = await gather_limited(
+                requests.values(), limit=max_concurrent_requests, return_exceptions=True
+            )
+            responses = dict(zip(requests.keys(), results))
+            for key, result in responses.items():
+                if isinstance(result, AmbisenseNoFacilityError):
+                    no_facility_errors.append(result)
+                    responses[key] = []
+                elif isinstance(result, BaseException):
+                    raise result
+
+            system_json = responses.pop("system")
             system = System.from_api(
                 brand=self.brand,
                 home=home,
                 timezone=home.timezone,
                 control_identifier=control_identifier,
-                connected=await self.get_connection_status(home.system_id)
-                if include_connection_status
-                else None,
-                diagnostic_trouble_codes=await self.get_diagnostic_trouble_codes(
-                    home.system_id
-                )
-                if include_diagnostic_trouble_codes
-                else None,
-                rts=await self.get_rts(home.system_id) if include_rts else None,
-                mpc=await self.get_mpc(home.system_id) if include_mpc else None,
-                current_system=dict_to_snake_case(current_system_json),
-                ambisense_capability=await self.get_ambisense_capability(home.system_id)
-                if include_ambisense_capability
-                else False,
-                ambisense_rooms=ambisense_rooms,
-                energy_management=await self.get_energy_management(home.system_id)
-                if include_energy_management
-                else None,
-                eebus=await self.get_eebus(home.system_id) if include_eebus else None,
-                **dict_to_snake_case(system_json),
-            )
-            yield system
-
-        if no_facility_error:
-            logger.warning(
-                "Ambisense rooms not available for one or more systems (%s), "
-                "consider disabling the Ambisense rooms option",
-                no_facility_error,
+                connected=responses.pop("connected", None),
+                diagnostic_trouble_codes=responses.pop(
+                    "diagnostic_trouble_codes", None
+                ),
+                rts=responses.pop("rts", None),
+                mpc=responses.pop("mpc", None),
+                current_system=responses.pop("current_system"),
+                ambisense_capability=responses.pop("ambisense_capability", False),
+                ambisense_rooms=responses.pop("ambisense_rooms", []),
+                energy_management=responses.pop("energy_management", None),
+                eebus=responses.pop("eebus", None),
+                **system_json,
             )
+            self._remember_system_values(system)
+            return system
 
     async def get_data_by_device(
         self,
@@ -473,19 +1147,25 @@ class MyPyllantAPI:
                 "endDate": data_to.isoformat(timespec="milliseconds"),
             }
             device_buckets_url = (
-                f"{await self.get_api_base()}/emf/v2/{device.system_id}/"
+                f"{get_api_base()}/emf/v2/{device.system_id}/"
                 f"devices/{device.device_uuid}/buckets?{urlencode(querystring)}"
             )
-            async with self.aiohttp_session.get(
-                device_buckets_url, headers=self.get_authorized_headers()
-            ) as device_buckets_resp:
-                device_buckets_json = await device_buckets_resp.json()
-                yield DeviceData.from_api(
-                    timezone=device.timezone,
-                    device=device,
-                    **dict_to_snake_case(device_buckets_json),
+            attributes = {
+                "mypyllant.system_id": device.system_id,
+                "mypyllant.device_uuid": device.device_uuid,
+                "mypyllant.operation_mode": data.operation_mode,
+                "mypyllant.energy_type": data.value_type,
+            }
+            with start_span(self.tracer, "mypyllant.get_data_by_device", attributes):
+                device_buckets_json = await self._request(
+                    "GET", device_buckets_url, response_type="json"
                 )
-                apis_hit += 1
+            yield DeviceData.from_api(
+                timezone=device.timezone,
+                device=device,
+                **dict_to_snake_case(device_buckets_json),
+            )
+            apis_hit += 1
         logger.debug(f"Queried {apis_hit} API endpoints for device data")
 
     async def get_yearly_reports(
@@ -500,14 +1180,78 @@ class MyPyllantAPI:
             system: The System object or system ID string
             year: The year of the report
         """
-        url = f"{await self.get_api_base()}/emf/v2/{system.id}/report/{year}"
-        async with self.aiohttp_session.get(
-            url, headers=self.get_authorized_headers()
-        ) as report_resp:
-            reports_json = await report_resp.json()
-            for report in dict_to_snake_case(reports_json):
-                yield SystemReport.from_api(**report)
+        url = f"{get_api_base()}/emf/v2/{system.id}/report/{year}"
+        reports_json = await self._request("GET", url, response_type="json")
+        for report in dict_to_snake_case(reports_json):
+            yield SystemReport.from_api(**report)
+
+    def _remember_system_values(self, system: System):
+        """
+        Keeps copies of the fetched values that idempotent writes compare against
+        """
+        targets: list[Any] = [
+            *system.zones,
+            *system.circuits,
+            *system.domestic_hot_water,
+            *system.ventilation,
+            *system.ambisense_rooms,
+        ]
+        for target in targets:
+            for attribute in IDEMPOTENT_WRITE_ATTRIBUTES.get(type(target), ()):
+                value = functools.reduce(
+                    lambda obj, name: getattr(obj, name, None),
+                    attribute.split("."),
+                    target,
+                )
+                self._remember_written_value(target, attribute, value)
+
+    def _remember_written_value(self, target: Any, attribute: str, value: Any):
+        if not self.idempotent_writes:
+            return
+        key = _get_written_value_key(target, attribute)
+        if value is None:
+            self._written_values.pop(key, None)
+        else:
+            # A copy, so editing i.e. a time program in place still counts as a change
+            self._written_values[key] = copy.deepcopy(value)
+
+    def _is_unchanged(self, target: Any, attribute: str, value: Any) -> bool:
+        """
+        Returns whether a write can be skipped, because idempotent writes are enabled and the value is the same
+        as when the system was fetched, or when it was last written
+        """
+        if not self.idempotent_writes:
+            return False
+        known = self._written_values.get(_get_written_value_key(target, attribute))
+        if known is None:
+            return False
+        if isinstance(known, BaseTimeProgram):
+            unchanged = known.has_same_schedule(value)
+        else:
+            unchanged = known == value
+        if unchanged:
+            logger.debug("Skipping write of unchanged %s %s", attribute, value)
+            self.skipped_write_count += 1
+        return unchanged
+
+    async def apply_writes(
+        self,
+        operations: Iterable[WriteOperation],
+        max_concurrent_targets: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+    ) -> list[WriteResult]:
+        """
+        Applies many changes concurrently across zones, rooms, circuits etc., and in order for each of them
+
+        Parameters:
+            operations: The changes, i.e. `WriteOperation("set_manual_mode_setpoint", zone, (21.0,))`
+            max_concurrent_targets: How many targets are changed at the same time
+
+        Returns:
+            A `WriteResult` with the return value or error of each operation, in the order of `operations`
+        """
+        return await apply_writes(self, operations, max_concurrent_targets)
 
+    @traced
     async def set_zone_operating_mode(
         self,
         zone: Zone,
@@ -528,32 +1272,34 @@ class MyPyllantAPI:
             raise ValueError(
                 f"Invalid HVAC mode, must be one of {', '.join(ZoneOperatingType)}"
             )
+        if zone.control_identifier.is_vrc700:
+            mode_enum = ZoneOperatingModeVRC700  # type: ignore
+        else:
+            mode_enum = ZoneOperatingMode  # type: ignore
+        if mode not in mode_enum:
+            raise ValueError(
+                f"Invalid mode, must be one of {', '.join(mode_enum.__members__)}"
+            )
+        attribute = f"{operating_type}.operation_mode_{operating_type}"
+        if self._is_unchanged(zone, attribute, mode):
+            return zone
+
         if zone.control_identifier.is_vrc700:
             url = (
                 f"{SYSTEM_CONTROL_API_URL_BASE}/systems/{zone.system_id}"
                 f"/zones/{zone.index}/{operating_type}-operation-mode"
             )
-            mode_enum = ZoneOperatingModeVRC700  # type: ignore
         else:
             if operating_type == "cooling":
                 url = f"{await self.get_system_api_base(zone.system_id)}/zones/{zone.index}/operation-mode"
                 payload["type"] = operating_type.upper()
             else:
                 url = f"{await self.get_system_api_base(zone.system_id)}/zones/{zone.index}/{operating_type}-operation-mode"
-            mode_enum = ZoneOperatingMode  # type: ignore
-
-        if mode not in mode_enum:
-            raise ValueError(
-                f"Invalid mode, must be one of {', '.join(mode_enum.__members__)}"
-            )
 
         payload["operationMode"] = str(mode)
 
-        await self.aiohttp_session.patch(
-            url,
-            json=payload,
-            headers=self.get_authorized_headers(),
-        )
+        await self._request("PATCH", url, json=payload)
+        self._remember_written_value(zone, attribute, mode_enum(mode))
 
         # zone.heating.operation_mode_heating or zone.cooling.operation_mode_cooling
         setattr(
@@ -601,21 +1347,17 @@ class MyPyllantAPI:
             }
             if duration_hours:
                 payload["duration"] = duration_hours
-            await self.aiohttp_session.patch(
-                url,
-                json=payload,
-                headers=self.get_authorized_headers(),
-            )
+            await self._request("PATCH", url, json=payload)
             zone.desired_room_temperature_setpoint = temperature
             return zone
         else:
-            await self.aiohttp_session.post(
+            await self._request(
+                "POST",
                 url,
                 json={
                     "desiredRoomTemperatureSetpoint": temperature,
                     "duration": duration_hours if duration_hours else default_duration,
                 },
-                headers=self.get_authorized_headers(),
             )
             zone.desired_room_temperature_setpoint = temperature
             zone.quick_veto_start_date_time = datetime.datetime.now(zone.timezone)
@@ -647,16 +1389,13 @@ class MyPyllantAPI:
         else:
             url = f"{await self.get_system_api_base(zone.system_id)}/zones/{zone.index}/quick-veto"
 
-        await self.aiohttp_session.patch(
-            url,
-            json={"duration": duration_hours},
-            headers=self.get_authorized_headers(),
-        )
+        await self._request("PATCH", url, json={"duration": duration_hours})
         zone.quick_veto_end_date_time = datetime.datetime.now(
             zone.timezone
         ) + datetime.timedelta(hours=duration_hours)
         return zone
 
+    @traced
     async def set_time_program_temperature(
         self,
         zone: Zone,
@@ -681,6 +1420,7 @@ class MyPyllantAPI:
         time_program.set_setpoint(temperature, update_similar_to_dow)
         return await self.set_zone_time_program(zone, program_type, time_program)
 
+    @traced
     async def set_manual_mode_setpoint(
         self,
         zone: Zone,
@@ -712,28 +1452,29 @@ class MyPyllantAPI:
             # PATCH .../zone/{index}/heating/manual-mode-setpoint (404). The real app
             # uses comfort-room-temperature instead.
             url = f"{await self.get_system_api_base(zone.system_id)}/zone/{zone.index}/heating/comfort-room-temperature"
-            await self.aiohttp_session.patch(
-                url,
-                json={"comfortRoomTemperature": temperature},
-                headers=self.get_authorized_headers(),
+            await self._request(
+                "PATCH", url, json={"comfortRoomTemperature": temperature}
             )
             zone.heating.day_temperature_heating = temperature
             zone.heating.manual_mode_setpoint_heating = temperature
+            self._remember_written_value(
+                zone, "heating.manual_mode_setpoint_heating", temperature
+            )
             zone.desired_room_temperature_setpoint_heating = temperature
             if zone.heating.operation_mode_heating == ZoneOperatingModeVRC700.DAY:
                 zone.desired_room_temperature_setpoint = temperature
             return zone
 
+        attribute = f"{setpoint_type}.manual_mode_setpoint_{setpoint_type}"
+        if self._is_unchanged(zone, attribute, temperature):
+            return zone
         payload: dict[str, Any] = {
             "setpoint": temperature,
             "type": setpoint_type.upper(),
         }
         url = f"{await self.get_system_api_base(zone.system_id)}/zones/{zone.index}/manual-mode-setpoint"
-        await self.aiohttp_session.patch(
-            url,
-            json=payload,
-            headers=self.get_authorized_headers(),
-        )
+        await self._request("PATCH", url, json=payload)
+        self._remember_written_value(zone, attribute, temperature)
         # zone.heating.manual_mode_setpoint_heating or zone.cooling.manual_mode_setpoint_cooling
         setattr(
             getattr(zone, setpoint_type.lower()),
@@ -750,6 +1491,7 @@ class MyPyllantAPI:
 
         return zone
 
+    @traced
     async def set_cooling_setpoint(
         self,
         zone: Zone,
@@ -763,21 +1505,21 @@ class MyPyllantAPI:
             temperature: The target cooling temperature
         """
         logger.debug("Setting cooling setpoint for %s to %s", zone.name, temperature)
+        if self._is_unchanged(zone, "cooling.setpoint_cooling", temperature):
+            return zone
         payload: dict[str, Any] = {"setpoint": temperature}
         if zone.control_identifier.is_vrc700:
             url = f"{await self.get_system_api_base(zone.system_id)}/zone/{zone.index}/cooling/setpoint"
         else:
             url = f"{await self.get_system_api_base(zone.system_id)}/zones/{zone.index}/setpoint-cooling"
-        await self.aiohttp_session.patch(
-            url,
-            json=payload,
-            headers=self.get_authorized_headers(),
-        )
+        await self._request("PATCH", url, json=payload)
+        self._remember_written_value(zone, "cooling.setpoint_cooling", temperature)
         if zone.cooling:
             zone.desired_room_temperature_setpoint_cooling = temperature
             zone.cooling.setpoint_cooling = temperature
         return zone
 
+    @traced
     async def set_time_controlled_cooling_setpoint(
         self,
         zone: Zone,
@@ -805,12 +1547,13 @@ class MyPyllantAPI:
         else:
             url = f"{await self.get_system_api_base(zone.system_id)}/zones/{zone.index}/quick-veto"
 
-        await self.aiohttp_session.delete(url, headers=self.get_authorized_headers())
+        await self._request("DELETE", url)
         zone.quick_veto_start_date_time = None
         zone.quick_veto_end_date_time = None
         zone.current_special_function = ZoneCurrentSpecialFunction.NONE
         return zone
 
+    @traced
     async def set_set_back_temperature(
         self, zone: Zone, temperature: float, setback_type: str = "heating"
     ):
@@ -822,24 +1565,29 @@ class MyPyllantAPI:
             temperature: The setback temperature
             setback_type: Only supported on VRC700 controllers, either heating or cooling
         """
+        if zone.control_identifier.is_vrc700 and setback_type not in ZoneOperatingType:
+            raise ValueError(
+                f"Invalid setback type, must be one of {', '.join(ZoneOperatingType)}"
+            )
+        # Only the heating setback temperature is known
+        if setback_type == "heating" and self._is_unchanged(
+            zone, "heating.set_back_temperature", temperature
+        ):
+            return zone
         if zone.control_identifier.is_vrc700:
-            if setback_type not in ZoneOperatingType:
-                raise ValueError(
-                    f"Invalid setback type, must be one of {', '.join(ZoneOperatingType)}"
-                )
             url = f"{await self.get_system_api_base(zone.system_id)}/zone/{zone.index}/{setback_type}/set-back-temperature"
         else:
             url = f"{await self.get_system_api_base(zone.system_id)}/zones/{zone.index}/set-back-temperature"
-        await self.aiohttp_session.patch(
-            url,
-            json={"setBackTemperature": temperature},
-            headers=self.get_authorized_headers(),
-        )
+        await self._request("PATCH", url, json={"setBackTemperature": temperature})
         # TODO: What to do with cooling?
         if setback_type == "heating":
             zone.heating.set_back_temperature = temperature
+            self._remember_written_value(
+                zone, "heating.set_back_temperature", temperature
+            )
         return zone
 
+    @traced
     async def set_zone_time_program(
         self,
         zone: Zone,
@@ -860,22 +1608,22 @@ class MyPyllantAPI:
             raise ValueError(
                 "Type must be either heating or cooling, not %s", program_type
             )
+        if zone.control_identifier.is_vrc700 and setback_type not in ZoneOperatingType:
+            raise ValueError(
+                f"Invalid veto type, must be one of {', '.join(ZoneOperatingType)}"
+            )
+        attribute = f"{setback_type}.time_program_{setback_type}"
+        if self._is_unchanged(zone, attribute, time_program):
+            return zone
         if zone.control_identifier.is_vrc700:
-            if setback_type not in ZoneOperatingType:
-                raise ValueError(
-                    f"Invalid veto type, must be one of {', '.join(ZoneOperatingType)}"
-                )
             url = f"{await self.get_system_api_base(zone.system_id)}/zone/{zone.index}/{setback_type}/time-windows"
         else:
             url = f"{await self.get_system_api_base(zone.system_id)}/zones/{zone.index}/time-windows"
         data = asdict(time_program)
         data["type"] = program_type
         del data["meta_info"]
-        await self.aiohttp_session.patch(
-            url,
-            json=dict_to_camel_case(data),
-            headers=self.get_authorized_headers(),
-        )
+        await self._request("PATCH", url, json=dict_to_camel_case(data))
+        self._remember_written_value(zone, attribute, time_program)
 
         # zone.heating.time_program_heating = time_program or zone.cooling.time_program_cooling = time_program
         setattr(
@@ -883,6 +1631,7 @@ class MyPyllantAPI:
         )
         return zone
 
+    @traced
     async def set_holiday(
         self,
         system: System,
@@ -921,9 +1670,7 @@ class MyPyllantAPI:
             if setpoint is not None:
                 raise ValueError("setpoint is not supported on this controller")
 
-        await self.aiohttp_session.post(
-            url, json=data, headers=self.get_authorized_headers()
-        )
+        await self._request("POST", url, json=data)
         for zone in system.zones:
             zone.current_special_function = ZoneCurrentSpecialFunction.HOLIDAY
             zone.general.holiday_start_date_time = start
@@ -942,13 +1689,14 @@ class MyPyllantAPI:
         else:
             url = f"{await self.get_system_api_base(system.id)}/away-mode"
 
-        await self.aiohttp_session.delete(url, headers=self.get_authorized_headers())
+        await self._request("DELETE", url)
         for zone in system.zones:
             zone.current_special_function = ZoneCurrentSpecialFunction.NONE
             zone.general.holiday_start_date_time = None
             zone.general.holiday_end_date_time = None
         return system
 
+    @traced
     async def set_cooling_for_days(
         self,
         system: System,
@@ -993,10 +1741,10 @@ class MyPyllantAPI:
             "Setting cooling for days on system %s with data %s", system.id, data
         )
 
-        await self.aiohttp_session.post(
+        await self._request(
+            "POST",
             f"{await self.get_system_api_base(system.id)}/cooling-for-days",
             json=data,
-            headers=self.get_authorized_headers(),
         )
 
         if start and end:
@@ -1011,14 +1759,14 @@ class MyPyllantAPI:
         return system
 
     async def cancel_cooling_for_days(self, system: System):
-        await self.aiohttp_session.delete(
-            f"{await self.get_system_api_base(system.id)}/cooling-for-days",
-            headers=self.get_authorized_headers(),
+        await self._request(
+            "DELETE", f"{await self.get_system_api_base(system.id)}/cooling-for-days"
         )
         system.configuration["system"]["manual_cooling_start_date"] = None
         system.configuration["system"]["manual_cooling_end_date"] = None
         return system
 
+    @traced
     async def set_ventilation_boost(
         self,
         system: System,
@@ -1026,10 +1774,10 @@ class MyPyllantAPI:
         if system.control_identifier.is_vrc700:
             raise ValueError("Not supported on VRC700 controllers")
 
-        await self.aiohttp_session.post(
+        await self._request(
+            "POST",
             f"{await self.get_system_api_base(system.id)}/ventilation-boost",
             json={},
-            headers=self.get_authorized_headers(),
         )
 
         for zone in system.zones:
@@ -1040,9 +1788,8 @@ class MyPyllantAPI:
         if system.control_identifier.is_vrc700:
             raise ValueError("Not supported on VRC700 controllers")
 
-        await self.aiohttp_session.delete(
-            f"{await self.get_system_api_base(system.id)}/ventilation-boost",
-            headers=self.get_authorized_headers(),
+        await self._request(
+            "DELETE", f"{await self.get_system_api_base(system.id)}/ventilation-boost"
         )
 
         # TODO: Need the switch to the right previous special function
@@ -1050,6 +1797,7 @@ class MyPyllantAPI:
             zone.current_special_function = ZoneCurrentSpecialFunction.NONE
         return system
 
+    @traced
     async def set_domestic_hot_water_temperature(
         self, domestic_hot_water: DomesticHotWater, temperature: int | float
     ):
@@ -1061,23 +1809,28 @@ class MyPyllantAPI:
             temperature: The desired temperature. VRC700 controllers support 0.5 degree
                 steps, other controllers only support whole numbers and floats get rounded
         """
+        if not domestic_hot_water.control_identifier.is_vrc700 and isinstance(
+            temperature, float
+        ):
+            logger.warning("Domestic hot water can only be set to whole numbers")
+            temperature = int(round(temperature, 0))
+        if self._is_unchanged(domestic_hot_water, "tapping_setpoint", temperature):
+            return domestic_hot_water
         if domestic_hot_water.control_identifier.is_vrc700:
             url = (
                 f"{SYSTEM_CONTROL_API_URL_BASE}/systems/{domestic_hot_water.system_id}"
                 f"/domestic-hot-water/{domestic_hot_water.index}/tapping-setpoint"
             )
         else:
-            if isinstance(temperature, float):
-                logger.warning("Domestic hot water can only be set to whole numbers")
-                temperature = int(round(temperature, 0))
             url = (
                 f"{await self.get_system_api_base(domestic_hot_water.system_id)}"
                 f"/domestic-hot-water/{domestic_hot_water.index}/temperature"
             )
-        await self.aiohttp_session.patch(
-            url, json={"setpoint": temperature}, headers=self.get_authorized_headers()
-        )
+        await self._request("PATCH", url, json={"setpoint": temperature})
         domestic_hot_water.tapping_setpoint = temperature
+        self._remember_written_value(
+            domestic_hot_water, "tapping_setpoint", temperature
+        )
         return domestic_hot_water
 
     async def boost_domestic_hot_water(self, domestic_hot_water: DomesticHotWater):
@@ -1091,9 +1844,7 @@ class MyPyllantAPI:
             f"{await self.get_system_api_base(domestic_hot_water.system_id)}"
             f"/domestic-hot-water/{domestic_hot_water.index}/boost"
         )
-        await self.aiohttp_session.post(
-            url, json={}, headers=self.get_authorized_headers()
-        )
+        await self._request("POST", url, json={})
         domestic_hot_water.current_special_function = (
             DHWCurrentSpecialFunction.CYLINDER_BOOST
         )
@@ -1110,10 +1861,11 @@ class MyPyllantAPI:
             f"{await self.get_system_api_base(domestic_hot_water.system_id)}"
             f"/domestic-hot-water/{domestic_hot_water.index}/boost"
         )
-        await self.aiohttp_session.delete(url, headers=self.get_authorized_headers())
+        await self._request("DELETE", url)
         domestic_hot_water.current_special_function = DHWCurrentSpecialFunction.REGULAR
         return domestic_hot_water
 
+    @traced
     async def set_domestic_hot_water_operation_mode(
         self,
         domestic_hot_water: DomesticHotWater,
@@ -1126,15 +1878,13 @@ class MyPyllantAPI:
             domestic_hot_water: The water heater
             mode: The operation mode
         """
+        if self._is_unchanged(domestic_hot_water, "operation_mode_dhw", mode):
+            return domestic_hot_water
         url = (
             f"{await self.get_system_api_base(domestic_hot_water.system_id)}/domestic-hot-water/"
             f"{domestic_hot_water.index}/operation-mode"
         )
-        await self.aiohttp_session.patch(
-            url,
-            json={"operationMode": str(mode)},
-            headers=self.get_authorized_headers(),
-        )
+        await self._request("PATCH", url, json={"operationMode": str(mode)})
 
         if isinstance(mode, str):
             if domestic_hot_water.control_identifier.is_vrc700:
@@ -1142,8 +1892,10 @@ class MyPyllantAPI:
             else:
                 mode = DHWOperationMode(mode)
         domestic_hot_water.operation_mode_dhw = mode
+        self._remember_written_value(domestic_hot_water, "operation_mode_dhw", mode)
         return domestic_hot_water
 
+    @traced
     async def set_domestic_hot_water_time_program(
         self, domestic_hot_water: DomesticHotWater, time_program: DHWTimeProgram
     ):
@@ -1154,20 +1906,22 @@ class MyPyllantAPI:
             domestic_hot_water: The water heater
             time_program: The schedule
         """
+        if self._is_unchanged(domestic_hot_water, "time_program_dhw", time_program):
+            return domestic_hot_water
         url = (
             f"{await self.get_system_api_base(domestic_hot_water.system_id)}"
             f"/domestic-hot-water/{domestic_hot_water.index}/time-windows"
         )
         data = asdict(time_program)
         del data["meta_info"]
-        await self.aiohttp_session.patch(
-            url,
-            json=dict_to_camel_case(data),
-            headers=self.get_authorized_headers(),
-        )
+        await self._request("PATCH", url, json=dict_to_camel_case(data))
         domestic_hot_water.time_program_dhw = time_program
+        self._remember_written_value(
+            domestic_hot_water, "time_program_dhw", time_program
+        )
         return domestic_hot_water
 
+    @traced
     async def set_domestic_hot_water_circulation_time_program(
         self, domestic_hot_water: DomesticHotWater, time_program: DHWTimeProgram
     ):
@@ -1178,20 +1932,24 @@ class MyPyllantAPI:
             domestic_hot_water: The water heater
             time_program: The schedule
         """
+        if self._is_unchanged(
+            domestic_hot_water, "time_program_circulation_pump", time_program
+        ):
+            return domestic_hot_water
         url = (
             f"{await self.get_system_api_base(domestic_hot_water.system_id)}"
             f"/domestic-hot-water/{domestic_hot_water.index}/circulation-pump-time-windows"
         )
         data = asdict(time_program)
         del data["meta_info"]
-        await self.aiohttp_session.patch(
-            url,
-            json=dict_to_camel_case(data),
-            headers=self.get_authorized_headers(),
-        )
+        await self._request("PATCH", url, json=dict_to_camel_case(data))
         domestic_hot_water.time_program_circulation_pump = time_program
+        self._remember_written_value(
+            domestic_hot_water, "time_program_circulation_pump", time_program
+        )
         return domestic_hot_water
 
+    @traced
     async def set_ventilation_operation_mode(
         self,
         ventilation: Ventilation,
@@ -1204,20 +1962,24 @@ class MyPyllantAPI:
             ventilation: The ventilation device
             mode: The operation mode
         """
+        if self._is_unchanged(ventilation, "operation_mode_ventilation", mode):
+            return ventilation
         url = (
             f"{await self.get_system_api_base(ventilation.system_id)}"
             f"/ventilation/{ventilation.index}/operation-mode"
         )
-        await self.aiohttp_session.patch(
+        await self._request(
+            "PATCH",
             url,
             json={
                 "operationMode": str(mode),
             },
-            headers=self.get_authorized_headers(),
         )
         ventilation.operation_mode_ventilation = mode
+        self._remember_written_value(ventilation, "operation_mode_ventilation", mode)
         return ventilation
 
+    @traced
     async def set_ventilation_fan_stage(
         self,
         ventilation: Ventilation,
@@ -1232,23 +1994,23 @@ class MyPyllantAPI:
             maximum_fan_stage: The maximum fan speed, from 1-6
             fan_stage_type: The fan stage type (day or night)
         """
+        attribute = f"maximum_{fan_stage_type.lower()}_fan_stage"
+        if self._is_unchanged(ventilation, attribute, maximum_fan_stage):
+            return ventilation
         url = (
             f"{await self.get_system_api_base(ventilation.system_id)}"
             f"/ventilation/{ventilation.index}/fan-stage"
         )
-        await self.aiohttp_session.patch(
+        await self._request(
+            "PATCH",
             url,
             json={
                 "maximumFanStage": maximum_fan_stage,
                 "type": str(fan_stage_type),
             },
-            headers=self.get_authorized_headers(),
-        )
-        setattr(
-            ventilation,
-            f"maximum_{fan_stage_type.lower()}_fan_stage",
-            maximum_fan_stage,
         )
+        setattr(ventilation, attribute, maximum_fan_stage)
+        self._remember_written_value(ventilation, attribute, maximum_fan_stage)
         return ventilation
 
     async def get_connection_status(self, system: System | str) -> bool:
@@ -1259,15 +2021,12 @@ class MyPyllantAPI:
             system: The System object or system ID string
         """
         url = (
-            f"{await self.get_api_base()}/systems/"
+            f"{get_api_base()}/systems/"
             f"{get_system_id(system)}/meta-info/connection-status"
         )
-        response = await self.aiohttp_session.get(
-            url,
-            headers=self.get_authorized_headers(),
-        )
+        response_json = await self._request("GET", url, response_type="json")
         try:
-            return (await response.json())["connected"]
+            return response_json["connected"]
         except KeyError:
             logger.warning("Couldn't get connection status")
             return False
@@ -1285,17 +2044,15 @@ class MyPyllantAPI:
             # We already have the control identifier cached
             control_identifier = self.control_identifiers[system_id]
         else:
-            url = (
-                f"{await self.get_api_base()}/systems/"
-                f"{system_id}/meta-info/control-identifier"
-            )
-            response = await self.aiohttp_session.get(
-                url,
-                headers=self.get_authorized_headers(),
-            )
+            url = f"{get_api_base()}/systems/{system_id}/meta-info/control-identifier"
+            response_json = await self._request("GET", url, response_type="json")
             try:
-                control_identifier = (await response.json())["controlIdentifier"]
+                control_identifier = response_json["controlIdentifier"]
                 self.control_identifiers[system_id] = control_identifier
+                if self.meta_info_store:
+                    self.meta_info_store.set(
+                        "control_identifiers", system_id, control_identifier
+                    )
             except KeyError:
                 logger.warning("Couldn't get control identifier")
                 control_identifier = DEFAULT_CONTROL_IDENTIFIER
@@ -1317,16 +2074,14 @@ class MyPyllantAPI:
         else:
             logger.debug("Fetching timezone for system %s", system_id)
             url = (
-                f"{await self.get_api_base()}/systems/"
-                f"{get_system_id(system)}/meta-info/time-zone"
-            )
-            response = await self.aiohttp_session.get(
-                url,
-                headers=self.get_authorized_headers(),
+                f"{get_api_base()}/systems/{get_system_id(system)}/meta-info/time-zone"
             )
+            response_json = await self._request("GET", url, response_type="json")
             try:
-                tz_key = (await response.json())["timeZone"]
+                tz_key = response_json["timeZone"]
                 self.time_zones[system_id] = tz_key
+                if self.meta_info_store:
+                    self.meta_info_store.set("time_zones", system_id, tz_key)
                 return ZoneInfo(key=tz_key)
             except (KeyError, TypeError):
                 logger.warning("Couldn't get timezone from API")
@@ -1342,18 +2097,13 @@ class MyPyllantAPI:
             system: The System object or system ID string
         """
         url = (
-            f"{await self.get_api_base()}/systems/"
-            f"{get_system_id(system)}/diagnostic-trouble-codes"
+            f"{get_api_base()}/systems/{get_system_id(system)}/diagnostic-trouble-codes"
         )
         try:
-            response = await self.aiohttp_session.get(
-                url,
-                headers=self.get_authorized_headers(),
-            )
+            result = await self._request("GET", url, response_type="json")
         except ClientResponseError as e:
             logger.warning("Could not get diagnostic trouble codes", exc_info=e)
             return None
-        result = await response.json()
         return dict_to_snake_case(result)
 
     async def get_rts(self, system: System | str) -> dict:
@@ -1363,17 +2113,15 @@ class MyPyllantAPI:
         Parameters:
             system: The System object or system ID string
         """
-        url = f"{await self.get_api_base()}/rts/{get_system_id(system)}/devices"
+        url = f"{get_api_base()}/rts/{get_system_id(system)}/devices"
         try:
             logger.debug("Getting RTS data")
-            response = await self.aiohttp_session.get(
-                url,
-                headers=self.get_authorized_headers(),
+            result = await self._request(
+                "GET", url, response_type="json", endpoint="rts"
             )
-        except ClientResponseError as e:
+        except OPTIONAL_ENDPOINT_ERRORS as e:
             logger.warning("Could not get RTS data", exc_info=e)
             return {"statistics": []}
-        result = await response.json()
         return dict_to_snake_case(result)
 
     async def get_mpc(self, system: System | str) -> dict:
@@ -1383,17 +2131,15 @@ class MyPyllantAPI:
         Parameters:
             system: The System object or system ID string
         """
-        url = f"{await self.get_api_base()}/hem/{get_system_id(system)}/mpc"
+        url = f"{get_api_base()}/hem/{get_system_id(system)}/mpc"
         try:
             logger.debug("Getting MPC data")
-            response = await self.aiohttp_session.get(
-                url,
-                headers=self.get_authorized_headers(),
+            result = await self._request(
+                "GET", url, response_type="json", endpoint="mpc"
             )
-        except ClientResponseError as e:
+        except OPTIONAL_ENDPOINT_ERRORS as e:
             logger.warning("Could not get MPC data", exc_info=e)
             return {"devices": []}
-        result = await response.json()
         return dict_to_snake_case(result)
 
     async def get_energy_management(self, system: System | str) -> dict:
@@ -1403,16 +2149,14 @@ class MyPyllantAPI:
         Parameters:
             system: The System object or system ID string
         """
-        url = f"{await self.get_api_base()}/eebus/energy-management/{get_system_id(system)}"
+        url = f"{get_api_base()}/eebus/energy-management/{get_system_id(system)}"
         try:
-            response = await self.aiohttp_session.get(
-                url,
-                headers=self.get_authorized_headers(),
+            result = await self._request(
+                "GET", url, response_type="json", endpoint="eebus"
             )
-        except ClientResponseError as e:
+        except OPTIONAL_ENDPOINT_ERRORS as e:
             logger.warning("Could not get energy management data", exc_info=e)
             return {}
-        result = await response.json()
         return dict_to_snake_case(result)
 
     async def get_eebus(self, system: System | str) -> dict:
@@ -1422,16 +2166,14 @@ class MyPyllantAPI:
         Parameters:
             system: The System object or system ID string
         """
-        url = f"{await self.get_api_base()}/ship/{get_system_id(system)}/self"
+        url = f"{get_api_base()}/ship/{get_system_id(system)}/self"
         try:
-            response = await self.aiohttp_session.get(
-                url,
-                headers=self.get_authorized_headers(),
+            result = await self._request(
+                "GET", url, response_type="json", endpoint="eebus"
             )
-        except ClientResponseError as e:
+        except OPTIONAL_ENDPOINT_ERRORS as e:
             logger.warning("Could not get eebus information", exc_info=e)
             return {}
-        result = await response.json()
         return dict_to_snake_case(result)
 
     async def toggle_eebus(
@@ -1444,11 +2186,10 @@ class MyPyllantAPI:
             system: The System object or system ID string
             enabled: Whether to enable or disable EEBUS
         """
-        await self.aiohttp_session.put(
-            f"{await self.get_api_base()}/ship/{get_system_id(system)}/self/spine",
-            json={"enabled": enabled},
-            headers=self.get_authorized_headers(),
-        )
+        url = f"{get_api_base()}/ship/{get_system_id(system)}/self"
+        await self._request("PUT", f"{url}/spine", json={"enabled": enabled})
+        if self.response_cache:
+            await self.response_cache.invalidate(url)
         if isinstance(system, System) and system.eebus:
             system.eebus["spline_enabled"] = enabled
             return system
@@ -1463,14 +2204,12 @@ class MyPyllantAPI:
         """
         url = f"{get_api_base()}/api/v1/ambisense/facilities/{get_system_id(system)}/capability"
         try:
-            response = await self.aiohttp_session.get(
-                url,
-                headers=self.get_authorized_headers(),
+            result = await self._request(
+                "GET", url, response_type="json", endpoint="ambisense"
             )
-        except ClientResponseError as e:
+        except OPTIONAL_ENDPOINT_ERRORS as e:
             logger.warning("Could not get ambisense capability data", exc_info=e)
             return False
-        result = await response.json()
         return dict_to_snake_case(result).get("rbr_capable", False)
 
     async def get_ambisense_rooms(self, system: System | str) -> list[dict]:
@@ -1482,12 +2221,13 @@ class MyPyllantAPI:
         """
         url = f"{get_api_base()}/api/v1/ambisense/facilities/{get_system_id(system)}/rooms"
         try:
-            response = await self.aiohttp_session.get(
-                url,
-                headers=self.get_authorized_headers(),
+            result = await self._request(
+                "GET", url, response_type="json", endpoint="ambisense"
             )
-        except ClientResponseError as e:
-            if "NO_FACILITY_FOR_SYSTEM_ID" in e.message:
+        except OPTIONAL_ENDPOINT_ERRORS as e:
+            if isinstance(e, ClientResponseError) and (
+                "NO_FACILITY_FOR_SYSTEM_ID" in e.message
+            ):
                 logger.debug(
                     "Ambisense rooms not available for system %s",
                     get_system_id(system),
@@ -1495,11 +2235,12 @@ class MyPyllantAPI:
                 raise AmbisenseNoFacilityError(get_system_id(system)) from e
             logger.warning("Could not get rooms data", exc_info=e)
             return []
-        result = dict_to_snake_case(await response.json())
+        result = dict_to_snake_case(result)
         for room in result:
             room["time_program"] = room.pop("timeprogram")
         return result
 
+    @traced
     async def set_ambisense_room_operation_mode(
         self,
         room: AmbisenseRoom,
@@ -1512,12 +2253,12 @@ class MyPyllantAPI:
             room: The room
             mode: The operation mode
         """
-        url = f"{await self.get_api_base()}/api/v1/ambisense/facilities/{room.system_id}/rooms/{room.room_index}/configuration/operation-mode"
-        await self.aiohttp_session.put(
-            url,
-            json={"operationMode": str(mode).lower()},
-            headers=self.get_authorized_headers(),
-        )
+        if self._is_unchanged(
+            room, "room_configuration.operation_mode", str(mode).upper()
+        ):
+            return room
+        url = f"{get_api_base()}/api/v1/ambisense/facilities/{room.system_id}/rooms/{room.room_index}/configuration/operation-mode"
+        await self._request("PUT", url, json={"operationMode": str(mode).lower()})
 
         if isinstance(mode, str):
             room.room_configuration.operation_mode = AmbisenseRoomOperationMode(
@@ -1525,6 +2266,11 @@ class MyPyllantAPI:
             )
         else:
             room.room_configuration.operation_mode = mode
+        self._remember_written_value(
+            room,
+            "room_configuration.operation_mode",
+            room.room_configuration.operation_mode,
+        )
         return room
 
     async def quick_veto_ambisense_room(
@@ -1551,18 +2297,14 @@ class MyPyllantAPI:
         if duration_minutes and duration_minutes < 30:
             raise ValueError("duration_minutes must be greater than 30")
 
-        url = f"{await self.get_api_base()}/api/v1/ambisense/facilities/{room.system_id}/rooms/{room.room_index}/configuration/quick-veto"
+        url = f"{get_api_base()}/api/v1/ambisense/facilities/{room.system_id}/rooms/{room.room_index}/configuration/quick-veto"
 
         payload = {
             "temperatureSetpoint": temperature,
             "duration": duration_minutes or default_duration,
         }
 
-        await self.aiohttp_session.put(
-            url,
-            json=payload,
-            headers=self.get_authorized_headers(),
-        )
+        await self._request("PUT", url, json=payload)
 
         room.room_configuration.temperature_setpoint = temperature
         room.room_configuration.quick_veto_end_time = datetime.datetime.now(
@@ -1579,12 +2321,13 @@ class MyPyllantAPI:
         Parameters:
             room: The target room
         """
-        url = f"{await self.get_api_base()}/api/v1/ambisense/facilities/{room.system_id}/rooms/{room.room_index}/configuration/quick-veto"
+        url = f"{get_api_base()}/api/v1/ambisense/facilities/{room.system_id}/rooms/{room.room_index}/configuration/quick-veto"
 
-        await self.aiohttp_session.delete(url, headers=self.get_authorized_headers())
+        await self._request("DELETE", url)
         room.room_configuration.quick_veto_end_time = None
         return room
 
+    @traced
     async def set_ambisense_room_manual_mode_setpoint_temperature(
         self,
         room: AmbisenseRoom,
@@ -1603,19 +2346,23 @@ class MyPyllantAPI:
             temperature,
             room.name,
         )
+        if self._is_unchanged(
+            room, "room_configuration.temperature_setpoint", temperature
+        ):
+            return room
         payload: dict[str, Any] = {
             "temperatureSetpoint": temperature,
         }
-        url = f"{await self.get_api_base()}/api/v1/ambisense/facilities/{room.system_id}/rooms/{room.room_index}/configuration/temperature-setpoint"
+        url = f"{get_api_base()}/api/v1/ambisense/facilities/{room.system_id}/rooms/{room.room_index}/configuration/temperature-setpoint"
 
-        await self.aiohttp_session.put(
-            url,
-            json=payload,
-            headers=self.get_authorized_headers(),
-        )
+        await self._request("PUT", url, json=payload)
         room.room_configuration.temperature_setpoint = temperature
+        self._remember_written_value(
+            room, "room_configuration.temperature_setpoint", temperature
+        )
         return room
 
+    @traced
     async def set_ambisense_room_time_program(
         self, room: AmbisenseRoom, time_program: RoomTimeProgram
     ) -> AmbisenseRoom:
@@ -1626,17 +2373,19 @@ class MyPyllantAPI:
             room: The target room
             time_program: The new time program
         """
-        url = f"{await self.get_api_base()}/api/v1/ambisense/facilities/{room.system_id}/rooms/{room.room_index}/timeprogram"
+        if self._is_unchanged(room, "time_program", time_program):
+            return room
+        url = f"{get_api_base()}/api/v1/ambisense/facilities/{room.system_id}/rooms/{room.room_index}/timeprogram"
 
         data = asdict(time_program, dict_factory=RoomTimeProgram.dict_factory)
         payload = dict_to_camel_case(data)
 
-        await self.aiohttp_session.put(
-            url, json=payload, headers=self.get_authorized_headers()
-        )
+        await self._request("PUT", url, json=payload)
         room.time_program = time_program
+        self._remember_written_value(room, "time_program", time_program)
         return room
 
+    @traced
     async def set_circuit_heating_curve(
         self,
         circuit: Circuit,
@@ -1649,22 +2398,22 @@ class MyPyllantAPI:
         :param heating_curve:
         :return:
         """
-        url = f"{await self.get_system_api_base(circuit.system_id)}/circuit/{circuit.index}/heating-curve"
+        if self._is_unchanged(circuit, "heating_curve", heating_curve):
+            return circuit
+        endpoints = await self.get_system_endpoints(circuit.system_id)
+        url = f"{endpoints.system_api_base}/circuit/{circuit.index}/heating-curve"
 
-        control_identifier = await self.get_control_identifier(circuit.system_id)
-        if control_identifier.is_vrc700:
+        if endpoints.control_identifier.is_vrc700:
             payload = {"setPoint": heating_curve}
         else:
             payload = {"heatingCurve": heating_curve}
 
-        await self.aiohttp_session.patch(
-            url,
-            json=payload,
-            headers=self.get_authorized_headers(),
-        )
+        await self._request("PATCH", url, json=payload)
         circuit.heating_curve = heating_curve
+        self._remember_written_value(circuit, "heating_curve", heating_curve)
         return circuit
 
+    @traced
     async def set_circuit_heat_demand_limited_by_outside_temperature(
         self,
         circuit: Circuit,
@@ -1677,29 +2426,37 @@ class MyPyllantAPI:
         :param heat_demand_limited_by_outside_temperature:
         :return:
         """
-        control_identifier = await self.get_control_identifier(circuit.system_id)
-        if control_identifier.is_vrc700:
+        if self._is_unchanged(
+            circuit,
+            "heat_demand_limited_by_outside_temperature",
+            heat_demand_limited_by_outside_temperature,
+        ):
+            return circuit
+        endpoints = await self.get_system_endpoints(circuit.system_id)
+        if endpoints.control_identifier.is_vrc700:
             url = (
                 f"{SYSTEM_CONTROL_API_URL_BASE}/systems/{circuit.system_id}"
                 f"/circuits/{circuit.index}/heat-demand-limited-by-outside-temperature"
             )
             payload = {"setpoint": heat_demand_limited_by_outside_temperature}
         else:
-            url = f"{await self.get_system_api_base(circuit.system_id)}/circuit/{circuit.index}/heat-demand-limited-by-outside-temperature"
+            url = f"{endpoints.system_api_base}/circuit/{circuit.index}/heat-demand-limited-by-outside-temperature"
             payload = {
                 "heatDemandLimitedByOutsideTemperature": heat_demand_limited_by_outside_temperature
             }
 
-        await self.aiohttp_session.post(
-            url,
-            json=payload,
-            headers=self.get_authorized_headers(),
-        )
+        await self._request("POST", url, json=payload)
         circuit.heat_demand_limited_by_outside_temperature = (
             heat_demand_limited_by_outside_temperature
         )
+        self._remember_written_value(
+            circuit,
+            "heat_demand_limited_by_outside_temperature",
+            heat_demand_limited_by_outside_temperature,
+        )
         return circuit
 
+    @traced
     async def set_circuit_min_flow_temperature_setpoint(
         self,
         circuit: Circuit,
@@ -1712,14 +2469,25 @@ class MyPyllantAPI:
         :param min_flow_temperature_setpoint:
         :return:
         """
+        if self._is_unchanged(
+            circuit,
+            "heating_flow_temperature_minimum_setpoint",
+            min_flow_temperature_setpoint,
+        ):
+            return circuit
         url = f"{await self.get_system_api_base(circuit.system_id)}/circuit/{circuit.index}/min-flow-temperature-setpoint"
 
-        await self.aiohttp_session.patch(
+        await self._request(
+            "PATCH",
             url,
             json={"minFlowTemperatureSetpoint": min_flow_temperature_setpoint},
-            headers=self.get_authorized_headers(),
         )
         circuit.heating_flow_temperature_minimum_setpoint = (
             min_flow_temperature_setpoint
         )
+        self._remember_written_value(
+            circuit,
+            "heating_flow_temperature_minimum_setpoint",
+            min_flow_temperature_setpoint,
+        )
         return circuit
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import copy
+import json
+import logging
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+from myPyllant.const import CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+# Sentinel for cache misses, because None is a valid JSON response
+MISSING: Any = object()
+
+# TTL in seconds by regular expression matching the URL path, the first match wins
+# Endpoints without a match (or with a TTL of 0) are never cached
+DEFAULT_CACHE_TTLS: dict[str, float] = {
+    r"/homes$": CACHE_TTL,
+    r"/meta-info/control-identifier$": CACHE_TTL,
+    r"/meta-info/time-zone$": CACHE_TTL,
+    r"/ambisense/facilities/[^/]+/capability$": CACHE_TTL,
+    r"/ship/[^/]+/self$": CACHE_TTL,
+    r"/eebus/energy-management/[^/]+$": 60 * 60,
+    r"/currentSystem$": 0,
+    r"/mpc$": 0,
+}
+
+
+class ResponseCache(ABC):
+    """
+    Caches API responses of slow-changing endpoints
+
+    Subclass this and implement `load()`, `store()` and `invalidate()` to keep responses somewhere
+    other than in memory.
+
+    Parameters:
+        ttls: TTL in seconds by regular expression for the URL path, defaults to `DEFAULT_CACHE_TTLS`
+    """
+
+    def __init__(self, ttls: dict[str, float] | None = None):
+        if ttls is None:
+            ttls = DEFAULT_CACHE_TTLS
+        self.ttls = [(re.compile(pattern), ttl) for pattern, ttl in ttls.items()]
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get_ttl(self, url: str) -> float:
+        path = urlparse(url).path
+        for pattern, ttl in self.ttls:
+            if pattern.search(path):
+                return ttl
+        return 0
+
+    async def get(self, key: str) -> Any:
+        """
+        Returns the cached response, or `MISSING`
+        """
+        value = await self.load(key)
+        if value is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float):
+        await self.store(key, value, ttl)
+
+    @abstractmethod
+    async def load(self, key: str) -> Any:
+        """
+        Returns the stored response if it hasn't expired yet, otherwise `MISSING`
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def store(self, key: str, value: Any, ttl: float):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def invalidate(self, substring: str = ""):
+        """
+        Removes all responses with a key containing `substring`, or all responses if it's empty
+        """
+        raise NotImplementedError
+
+
+class MemoryResponseCache(ResponseCache):
+    def __init__(self, ttls: dict[str, float] | None = None):
+        super().__init__(ttls)
+        self._responses: dict[str, tuple[float, Any]] = {}
+
+    async def load(self, key: str) -> Any:
+        expires, value = self._responses.get(key, (0.0, MISSING))
+        if expires < time.monotonic():
+            self._responses.pop(key, None)
+            return MISSING
+        return copy.deepcopy(value)
+
+    async def store(self, key: str, value: Any, ttl: float):
+        self._responses[key] = (time.monotonic() + ttl, copy.deepcopy(value))
+
+    async def invalidate(self, substring: str = ""):
+        for key in [k for k in self._responses if substring in k]:
+            del self._responses[key]
+
+
+def get_default_cache_dir() -> Path:
+    """
+    Returns `$XDG_CACHE_HOME/myPyllant`, or `~/.cache/myPyllant`
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "myPyllant"
+
+
+class MetaInfoStore(ABC):
+    """
+    Persists meta info of systems (control identifiers, time zones) across restarts
+
+    Parameters:
+        ttl: Seconds after which a stored value is considered stale and fetched again
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL):
+        self.ttl = ttl
+
+    @abstractmethod
+    def load(self, kind: str) -> dict[str, str]:
+        """
+        Returns all values of `kind` (i.e. `control_identifiers`) that haven't expired, by system ID
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, kind: str, system_id: str, value: str):
+        raise NotImplementedError
+
+
+class JSONMetaInfoStore(MetaInfoStore):
+    """
+    Stores meta info in a JSON file, every update is written through to disk
+
+    Parameters:
+        path: Path of the JSON file, defaults to `meta-info.json` in `get_default_cache_dir()`
+        ttl: Seconds after which a stored value is considered stale and fetched again
+    """
+
+    def __init__(self, path: str | Path | None = None, ttl: float = CACHE_TTL):
+        super().__init__(ttl)
+        self.path = Path(path) if path else get_default_cache_dir() / "meta-info.json"
+        self._data: dict[str, dict[str, tuple[str, float]]] = self._read()
+
+    def _read(self) -> dict[str, dict[str, tuple[str, float]]]:
+        try:
+            with open(self.path) as fh:
+                data = json.load(fh)
+            return {
+                kind: {
+                    system_id: (value, updated)
+                    for system_id, (value, updated) in entries.items()
+                }
+                for kind, entries in data.items()
+            }
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, TypeError, AttributeError):
+            logger.warning("Couldn't read meta info from %s", self.path, exc_info=True)
+            return {}
+
+    def _write(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first, so a crash can't leave a corrupt file behind
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w") as fh:
+                json.dump(self._data, fh)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            logger.warning("Couldn't write meta info to %s", self.path, exc_info=True)
+
+    def load(self, kind: str) -> dict[str, str]:
+        now = time.time()
+        return {
+            system_id: value
+            for system_id, (value, updated) in self._data.get(kind, {}).items()
+            if now - updated < self.ttl
+        }
+
+    def set(self, kind: str, system_id: str, value: str):
+        self._data.setdefault(kind, {})[system_id] = (value, time.time())
+        self._write()
@@ -84,3 +84,10 @@ DEFAULT_HOLIDAY_DURATION = 365  # in days
 DEFAULT_QUICK_VETO_DURATION = 3.0  # in hours
 DEFAULT_CONTROL_IDENTIFIER = "tli"
 CACHE_TTL = 60 * 60 * 12  # in seconds
+DEFAULT_MAX_CONCURRENT_REQUESTS = 10  # per system in get_systems()
+DEFAULT_RATE_LIMIT = 10.0  # requests per second
+DEFAULT_RATE_LIMIT_BURST = 30
+DEFAULT_FLEET_RATE_LIMIT = 50.0  # requests per second of all accounts together
+DEFAULT_TOKEN_REFRESH_MARGIN = 60  # seconds before the access token expires
+TOKEN_REFRESH_RETRY_DELAY = 30  # seconds
+DEFAULT_WRITE_DEBOUNCE_DELAY = 0.5  # seconds
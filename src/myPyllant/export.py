@@ -6,8 +6,11 @@ import json
 import logging
 import sys
 import datetime
+from pathlib import Path
 
 from myPyllant.api import MyPyllantAPI
+from myPyllant.cache import JSONMetaInfoStore
+from myPyllant.token_store import FileTokenStore
 from myPyllant.enums import DeviceDataBucketResolution
 from myPyllant.models import DeviceData
 from myPyllant.utils import add_default_parser_args
@@ -49,6 +52,11 @@ parser.add_argument(
     help=f"Date where the data should start (ISO format, for example {sample_datetime} "
     f"or {sample_date})",
 )
+parser.add_argument(
+    "--cache-dir",
+    help="Directory where the login session, control identifiers and time zones are cached between runs",
+    required=False,
+)
 parser.add_argument(
     "-v", "--verbose", help="increase output verbosity", action="store_true"
 )
@@ -72,8 +80,22 @@ async def main(
     resolution=None,
     start=None,
     end=None,
+    cache_dir=None,
 ):
-    async with MyPyllantAPI(user, password, brand, country) as api:
+    meta_info_store = (
+        JSONMetaInfoStore(Path(cache_dir) / "meta-info.json") if cache_dir else None
+    )
+    token_store = (
+        FileTokenStore(Path(cache_dir) / "sessions.json") if cache_dir else None
+    )
+    async with MyPyllantAPI(
+        user,
+        password,
+        brand,
+        country,
+        meta_info_store=meta_info_store,
+        token_store=token_store,
+    ) as api:
         export_list = []
         async for system in api.get_systems(
             include_connection_status=True,
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from aiohttp import BaseConnector
+
+from myPyllant.api import MyPyllantAPI
+from myPyllant.const import DEFAULT_FLEET_RATE_LIMIT, DEFAULT_RATE_LIMIT
+from myPyllant.http_client import (
+    FLEET_POLLING_POOL,
+    ConnectionPoolConfig,
+    RateLimiter,
+)
+from myPyllant.models import System
+from myPyllant.utils import gather_limited
+
+logger = logging.getLogger(__name__)
+
+# Sentinel put in the queue of iter_all_systems() when an account is done
+_ACCOUNT_DONE: Any = object()
+
+# Arguments of MyPyllantAPI that the fleet sets itself, to share its connection pool and request budget
+FLEET_API_ARGUMENTS = ("pool_config", "connector", "session", "rate_limit")
+
+
+@dataclass(frozen=True)
+class FleetAccount:
+    username: str
+    password: str
+    brand: str
+    country: str | None = None
+
+
+class MyPyllantFleet:
+    """
+    Manages many accounts in one process, with a shared connection pool and a shared request budget
+
+    Every account keeps its own adaptive rate limiter, so an account that gets throttled only slows down itself.
+    All of them share a parent limiter with the fleet's total rate, and take turns in it.
+
+    Parameters:
+        accounts: The accounts to log in to
+        pool_config: Connection pool shared by all accounts, its `limit` caps the concurrent requests of the fleet
+        rate_limit: Maximum requests per second of the whole fleet
+        account_rate_limit: Maximum requests per second of each account
+        max_concurrent_logins: How many accounts log in at the same time
+        api_kwargs: Passed on to `MyPyllantAPI`, i.e. `response_cache` or `token_store`. The arguments in
+            `FLEET_API_ARGUMENTS` are set by the fleet and can't be passed
+
+    Examples:
+        >>> async with MyPyllantFleet([FleetAccount(user, password, brand, country)]) as fleet:
+        >>>     async for api, system in fleet.iter_all_systems():
+        >>>         print(api.username, system.water_pressure)
+    """
+
+    def __init__(
+        self,
+        accounts: Iterable[FleetAccount],
+        pool_config: ConnectionPoolConfig = FLEET_POLLING_POOL,
+        rate_limit: float = DEFAULT_FLEET_RATE_LIMIT,
+        account_rate_limit: float = DEFAULT_RATE_LIMIT,
+        max_concurrent_logins: int = 10,
+        **api_kwargs,
+    ) -> None:
+        fleet_arguments = [key for key in FLEET_API_ARGUMENTS if key in api_kwargs]
+        if fleet_arguments:
+            raise ValueError(
+                f"{', '.join(fleet_arguments)} can't be passed to the API of a fleet, "
+                "all accounts share its connection pool and request budget"
+            )
+        self.accounts = list(accounts)
+        self.pool_config = pool_config
+        self.rate_limiter = RateLimiter(rate=rate_limit)
+        self.account_rate_limit = account_rate_limit
+        self.max_concurrent_logins = max_concurrent_logins
+        self.api_kwargs = api_kwargs
+        self.apis: dict[str, MyPyllantAPI] = {}
+        self.login_errors: dict[str, BaseException] = {}
+        self.connector: BaseConnector | None = None
+
+    async def __aenter__(self) -> MyPyllantFleet:
+        self.connector = self.pool_config.create_connector()
+        apis = [self.create_api(account) for account in self.accounts]
+        results = await gather_limited(
+            (api.__aenter__() for api in apis),
+            self.max_concurrent_logins,
+            return_exceptions=True,
+        )
+        for account, api, result in zip(self.accounts, apis, results):
+            if isinstance(result, BaseException):
+                logger.warning(
+                    "Couldn't log in to %s", account.username, exc_info=result
+                )
+                self.login_errors[account.username] = result
+            else:
+                self.apis[account.username] = api
+        return self
+
+    async def __aexit__(self, *args, **kwargs) -> None:
+        await asyncio.gather(
+            *(api.__aexit__(*args, **kwargs) for api in self.apis.values())
+        )
+        self.apis = {}
+        if self.connector:
+            await self.connector.close()
+            self.connector = None
+
+    def create_api(self, account: FleetAccount) -> MyPyllantAPI:
+        api = MyPyllantAPI(
+            account.username,
+            account.password,
+            account.brand,
+            account.country,
+            pool_config=self.pool_config,
+            connector=self.connector,
+            rate_limit=None,
+            **self.api_kwargs,
+        )
+        api.aiohttp_session.rate_limiter = RateLimiter(
+            rate=self.account_rate_limit, parent=self.rate_limiter
+        )
+        return api
+
+    @property
+    def request_count(self) -> int:
+        return sum(api.aiohttp_session.request_count for api in self.apis.values())
+
+    async def iter_all_systems(
+        self, max_concurrent_accounts: int | None = None, **kwargs
+    ) -> AsyncIterator[tuple[MyPyllantAPI, System]]:
+        """
+        Returns systems of all accounts as soon as they are fetched
+
+        An account that fails is logged and skipped, the other accounts continue.
+
+        Parameters:
+            max_concurrent_accounts: How many accounts fetch systems at the same time, defaults to all of them
+            kwargs: Passed on to `MyPyllantAPI.get_systems()`, i.e. `max_concurrent_homes` for each account
+
+        Returns:
+            An Async Iterator of the account's `MyPyllantAPI` and a `System`
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(max_concurrent_accounts or len(self.apis) or 1)
+
+        async def fetch_account(api: MyPyllantAPI):
+            try:
+                async with semaphore:
+                    async for system in api.get_systems(**kwargs):
+                        await queue.put((api, system))
+            except Exception:
+                logger.warning(
+                    "Couldn't get systems of %s", api.username, exc_info=True
+                )
+            finally:
+                await queue.put(_ACCOUNT_DONE)
+
+        tasks = [asyncio.create_task(fetch_account(api)) for api in self.apis.values()]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                item = await queue.get()
+                if item is _ACCOUNT_DONE:
+                    remaining -= 1
+                else:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,10 +1,21 @@
 from __future__ import annotations
 
+import asyncio
+import datetime
 import logging
+import random
+import time
+from collections.abc import Mapping
+from typing import Any
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
 
 import aiohttp
 from aiohttp import ClientResponse, ClientResponseError, hdrs
 
+from myPyllant.const import DEFAULT_RATE_LIMIT, DEFAULT_RATE_LIMIT_BURST
+from myPyllant.metrics import SessionMetrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,53 +31,451 @@ class RealmInvalid(ConnectionError):
     pass
 
 
+class CircuitOpenError(ConnectionError):
+    """Raised instead of sending a request while the endpoint's circuit breaker is open."""
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Whether an error is likely to go away when the request is repeated
+    """
+    if isinstance(error, ClientResponseError):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Retries requests that failed with a transient error, with exponential backoff and full jitter
+
+    Parameters:
+        attempts: How often a request is sent in total, 1 to disable retries
+        backoff: Base delay in seconds, doubled on every attempt
+        max_backoff: Upper limit for the delay in seconds
+        methods: Only requests with these (idempotent) methods are retried
+    """
+
+    attempts: int = 3
+    backoff: float = 0.5
+    max_backoff: float = 10.0
+    methods: frozenset[str] = frozenset({"GET"})
+
+    def should_retry(self, method: str, attempt: int, error: BaseException) -> bool:
+        return (
+            attempt < self.attempts
+            and method.upper() in self.methods
+            and is_transient_error(error)
+        )
+
+    def get_delay(self, attempt: int, error: BaseException | None = None) -> float:
+        """
+        Returns the seconds to wait before the next attempt, at least as long as Retry-After asks for
+        """
+        delay = random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        )
+        if isinstance(error, ClientResponseError) and error.headers:
+            retry_after = parse_retry_after(error.headers.get(hdrs.RETRY_AFTER))
+            if retry_after:
+                delay = max(delay, min(retry_after, self.max_backoff))
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to an endpoint that keeps failing with transient errors
+
+    After `failure_threshold` consecutive failures, the circuit opens and requests fail immediately with
+    `CircuitOpenError`. After `reset_timeout` seconds, requests are let through again. The first success
+    closes the circuit, another failure opens it for another `reset_timeout` seconds.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return (
+            self.opened_at is not None
+            and time.monotonic() - self.opened_at < self.reset_timeout
+        )
+
+    def check(self, name: str):
+        if self.is_open:
+            raise CircuitOpenError(f"Circuit breaker for {name} is open")
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+@dataclass(frozen=True)
+class ConnectionPoolConfig:
+    """
+    Connection pool, keep-alive and timeout settings for the aiohttp session
+
+    See https://docs.aiohttp.org/en/stable/client_reference.html#tcpconnector
+    and https://docs.aiohttp.org/en/stable/client_reference.html#clienttimeout
+
+    Parameters:
+        limit: Total number of simultaneous connections, 0 for no limit
+        limit_per_host: Simultaneous connections to the same host, 0 for no limit
+        keepalive_timeout: Seconds an idle connection is kept open for reuse
+        ttl_dns_cache: Seconds DNS lookups are cached, None to cache forever
+        total_timeout: Timeout for a whole request in seconds, including reading the response
+        sock_connect_timeout: Timeout for connecting to a peer in seconds
+        sock_read_timeout: Maximum time between two reads from the socket in seconds
+    """
+
+    limit: int = 100
+    limit_per_host: int = 0
+    keepalive_timeout: float = 15.0
+    ttl_dns_cache: int | None = 10
+    total_timeout: float | None = 300
+    sock_connect_timeout: float | None = None
+    sock_read_timeout: float | None = None
+
+    def create_connector(self) -> aiohttp.TCPConnector:
+        return aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.ttl_dns_cache,
+        )
+
+    def create_timeout(self) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(
+            total=self.total_timeout,
+            sock_connect=self.sock_connect_timeout,
+            sock_read=self.sock_read_timeout,
+        )
+
+
+# One account with a single (or a few) homes, polled every few minutes
+SINGLE_HOME_POOL = ConnectionPoolConfig(
+    limit=10,
+    limit_per_host=10,
+    keepalive_timeout=60,
+    ttl_dns_cache=300,
+    total_timeout=60,
+    sock_connect_timeout=10,
+    sock_read_timeout=30,
+)
+
+# Many systems polled concurrently through one session, i.e. with max_concurrent_homes
+FLEET_POLLING_POOL = ConnectionPoolConfig(
+    limit=300,
+    limit_per_host=200,
+    keepalive_timeout=120,
+    ttl_dns_cache=600,
+    total_timeout=120,
+    sock_connect_timeout=10,
+    sock_read_timeout=60,
+)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Returns the seconds to wait from a Retry-After header, which is either a number or an HTTP date
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return max((retry_at - now).total_seconds(), 0.0)
+
+
+class RateLimiter:
+    """
+    Token bucket that limits the requests per second of a session
+
+    When the API responds with 429 or 503, the rate is multiplied by `backoff_factor` and requests pause for as
+    long as the Retry-After header asks. Every successful response raises the rate by `recovery_factor`, until
+    it's back at the configured maximum.
+
+    Parameters:
+        rate: Maximum requests per second
+        burst: How many requests can be sent at once before the rate applies
+        min_rate: The rate never drops below this, even after many throttled responses
+        backoff_factor: Multiplier for the rate after a throttled response
+        recovery_factor: Multiplier for the rate after a successful response
+        parent: A shared limiter every request also has to wait for, i.e. the budget of all accounts in a fleet.
+            Each limiter has at most one request waiting for its parent, so limiters sharing a parent take turns
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE_LIMIT,
+        burst: int = DEFAULT_RATE_LIMIT_BURST,
+        min_rate: float = 0.2,
+        backoff_factor: float = 0.5,
+        recovery_factor: float = 1.05,
+        parent: RateLimiter | None = None,
+    ):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min(min_rate, rate)
+        self.backoff_factor = backoff_factor
+        self.recovery_factor = recovery_factor
+        self.tokens = float(burst)
+        self.queue_depth = 0
+        self.wait_count = 0
+        self.wait_seconds = 0.0
+        self.throttled_count = 0
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+        self.parent = parent
+
+    def _refill(self, now: float):
+        self.tokens = min(
+            float(self.burst), self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    async def acquire(self):
+        """
+        Waits until a request may be sent. Waiting requests are let through in order.
+        """
+        started = time.monotonic()
+        self.queue_depth += 1
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    delay = self._blocked_until - now
+                    if delay <= 0:
+                        if self.tokens >= 1:
+                            self.tokens -= 1
+                            break
+                        delay = (1 - self.tokens) / self.rate
+                    await asyncio.sleep(delay)
+                if self.parent:
+                    await self.parent.acquire()
+        finally:
+            self.queue_depth -= 1
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            self.wait_count += 1
+            self.wait_seconds += waited
+
+    def update(self, status: int, headers: Mapping[str, str] | None = None):
+        """
+        Adapts the rate to the status of a response
+        """
+        if status in (429, 503):
+            retry_after = parse_retry_after((headers or {}).get(hdrs.RETRY_AFTER))
+            self.throttle(retry_after)
+        elif self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate * self.recovery_factor)
+
+    def throttle(self, retry_after: float | None = None):
+        self.throttled_count += 1
+        self.rate = max(self.min_rate, self.rate * self.backoff_factor)
+        self.tokens = min(self.tokens, 0.0)
+        if retry_after:
+            self._blocked_until = max(
+                self._blocked_until, time.monotonic() + retry_after
+            )
+        logger.debug(
+            "Throttled by API, lowering rate to %.2f requests/s (Retry-After: %s)",
+            self.rate,
+            retry_after,
+        )
+
+
 class CountingClientSession(aiohttp.ClientSession):
-    def __init__(self, *args, **kwargs):
+    def __init__(
+        self,
+        *args,
+        rate_limiter: RateLimiter | None = None,
+        metrics: SessionMetrics | None = None,
+        **kwargs,
+    ):
         super().__init__(*args, **kwargs)
         self.request_count = 0
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
 
     async def _request(self, method, str_or_url, **kwargs):
         self.request_count += 1
-        return await super()._request(method, str_or_url, **kwargs)
+        if self.rate_limiter:
+            await self.rate_limiter.acquire()
+        started = time.monotonic()
+        try:
+            response = await super()._request(method, str_or_url, **kwargs)
+        except ClientResponseError as e:
+            self._record_response(method, str_or_url, e.status, started)
+            if self.rate_limiter:
+                self.rate_limiter.update(e.status, e.headers)
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self._record_response(method, str_or_url, None, started)
+            raise
+        self._record_response(method, str_or_url, response.status, started)
+        if self.rate_limiter:
+            self.rate_limiter.update(response.status, response.headers)
+        return response
 
+    def _record_response(self, method, str_or_url, status: int | None, started: float):
+        if self.metrics:
+            self.metrics.record_response(
+                method, str_or_url, status, time.monotonic() - started
+            )
 
-async def on_request_start(session, context, params: aiohttp.TraceRequestStartParams):
-    """
-    See https://docs.aiohttp.org/en/stable/tracing_reference.html#aiohttp.TraceConfig.on_request_start
-    """
-    logger.debug("Starting %s to %s", params.method, params.url)
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """
+        Returns request metrics by endpoint, see `SessionMetrics.stats()`
+        """
+        return self.metrics.stats() if self.metrics else {}
 
 
-async def on_request_chunk_sent(
-    session, context, params: aiohttp.TraceRequestChunkSentParams
-):
+@dataclass(frozen=True)
+class DebugTracing:
     """
-    See https://docs.aiohttp.org/en/stable/tracing_reference.html#aiohttp.TraceConfig.on_request_chunk_sent
+    Logs requests and responses while the `myPyllant.http_client` logger is set to DEBUG
+
+    Bodies are logged from the chunks aiohttp sends and receives, so responses are never read or parsed twice.
+
+    Parameters:
+        sample_rate: Share of requests that are logged, between 0 and 1
+        max_body_length: How many bytes of request and response bodies are logged, None for all of them
+        timing_only: Only log method, URL, status and duration of requests, without bodies
     """
-    if params.chunk:
-        logger.debug(
-            "Sending %s to %s with %s",
-            params.method,
-            params.url,
-            params.chunk,
+
+    sample_rate: float = 1.0
+    max_body_length: int | None = 2000
+    timing_only: bool = False
+
+    def create_trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self.on_request_start)
+        trace_config.on_request_end.append(self.on_request_end)
+        trace_config.on_request_exception.append(self.on_request_exception)
+        if not self.timing_only:
+            trace_config.on_request_chunk_sent.append(self.on_request_chunk_sent)
+            trace_config.on_response_chunk_received.append(
+                self.on_response_chunk_received
+            )
+        return trace_config
+
+    def _truncate(self, context, chunk: bytes) -> str | None:
+        """
+        Returns the part of the chunk that still fits into `max_body_length`, None if nothing does
+        """
+        if self.max_body_length is None:
+            return chunk.decode(errors="replace")
+        remaining = self.max_body_length - context.body_length
+        context.body_length += len(chunk)
+        if remaining <= 0:
+            return None
+        text = chunk[:remaining].decode(errors="replace")
+        return text + "..." if len(chunk) > remaining else text
+
+    async def on_request_start(
+        self, session, context, params: aiohttp.TraceRequestStartParams
+    ):
+        """
+        See https://docs.aiohttp.org/en/stable/tracing_reference.html#aiohttp.TraceConfig.on_request_start
+        """
+        context.sampled = (
+            logger.isEnabledFor(logging.DEBUG) and random.random() < self.sample_rate
         )
+        context.started = time.monotonic()
+        context.body_length = 0
+        if context.sampled:
+            logger.debug("Starting %s to %s", params.method, params.url)
 
+    async def on_request_chunk_sent(
+        self, session, context, params: aiohttp.TraceRequestChunkSentParams
+    ):
+        """
+        See https://docs.aiohttp.org/en/stable/tracing_reference.html#aiohttp.TraceConfig.on_request_chunk_sent
+        """
+        if context.sampled and params.chunk:
+            body = self._truncate(context, params.chunk)
+            if body is not None:
+                logger.debug(
+                    "Sending %s to %s with %s", params.method, params.url, body
+                )
 
-async def on_request_end(session, context, params: aiohttp.TraceRequestEndParams):
+    async def on_request_end(
+        self, session, context, params: aiohttp.TraceRequestEndParams
+    ):
+        """
+        See https://docs.aiohttp.org/en/stable/tracing_reference.html#aiohttp.TraceConfig.on_request_end
+        and https://docs.python.org/3/howto/logging.html#optimization
+        """
+        context.body_length = 0
+        if context.sampled:
+            logger.debug(
+                "Got %s response for %s to %s in %.3fs",
+                params.response.status,
+                params.method,
+                params.url,
+                time.monotonic() - context.started,
+            )
+
+    async def on_request_exception(
+        self, session, context, params: aiohttp.TraceRequestExceptionParams
+    ):
+        """
+        See https://docs.aiohttp.org/en/stable/tracing_reference.html#aiohttp.TraceConfig.on_request_exception
+        """
+        if context.sampled:
+            logger.debug(
+                "Request %s to %s failed after %.3fs: %r",
+                params.method,
+                params.url,
+                time.monotonic() - context.started,
+                params.exception,
+            )
+
+    async def on_response_chunk_received(
+        self, session, context, params: aiohttp.TraceResponseChunkReceivedParams
+    ):
+        """
+        See https://docs.aiohttp.org/en/stable/tracing_reference.html#aiohttp.TraceConfig.on_response_chunk_received
+        """
+        if context.sampled:
+            body = self._truncate(context, params.chunk)
+            if body is not None:
+                logger.debug(
+                    "Got response body for %s to %s: %s",
+                    params.method,
+                    params.url,
+                    body,
+                )
+
+
+async def on_response_chunk_received(
+    session, context, params: aiohttp.TraceResponseChunkReceivedParams
+):
     """
-    See https://docs.aiohttp.org/en/stable/tracing_reference.html#aiohttp.TraceConfig.on_request_end
-    and https://docs.python.org/3/howto/logging.html#optimization
+    Counts the bytes received per endpoint in the session's metrics
     """
-    if params.headers.get(hdrs.CONTENT_TYPE, "").lower() == "application/json":
-        content = await params.response.json()
-    else:
-        content = await params.response.text()
-    logger.debug(
-        "Got response for %s to %s: %s",
-        params.method,
-        params.url,
-        content,
-    )
+    if getattr(session, "metrics", None):
+        session.metrics.record_bytes(params.method, params.url, len(params.chunk))
 
 
 async def on_raise_for_status(response: ClientResponse):
@@ -83,19 +492,38 @@ async def on_raise_for_status(response: ClientResponse):
     response.raise_for_status()
 
 
-def get_http_client(**kwargs) -> CountingClientSession:
-    trace_configs: list[aiohttp.TraceConfig] | None = None
-    if logger.isEnabledFor(logging.DEBUG):
-        trace_config = aiohttp.TraceConfig()
-        trace_config.on_request_start.append(on_request_start)
-        trace_config.on_request_end.append(on_request_end)
-        trace_config.on_request_chunk_sent.append(on_request_chunk_sent)
-        trace_configs = [trace_config]
+def get_http_client(
+    pool_config: ConnectionPoolConfig | None = None,
+    debug_tracing: DebugTracing | None = None,
+    **kwargs,
+) -> CountingClientSession:
+    """
+    Creates the session used by MyPyllantAPI
+
+    Parameters:
+        pool_config: Connection pool settings, aiohttp's defaults are used if not given
+        debug_tracing: How requests are logged, defaults to `DebugTracing()` if DEBUG logging is enabled
+        rate_limiter: Pass `rate_limiter=None` to disable rate limiting, or share a `RateLimiter` between sessions
+        metrics: Pass `metrics=None` to disable collecting request metrics by endpoint
+        kwargs: Passed on to `aiohttp.ClientSession`, overriding any defaults
+    """
+    metrics_trace_config = aiohttp.TraceConfig()
+    metrics_trace_config.on_response_chunk_received.append(on_response_chunk_received)
+    trace_configs = [metrics_trace_config]
+    if debug_tracing is None and logger.isEnabledFor(logging.DEBUG):
+        debug_tracing = DebugTracing()
+    if debug_tracing:
+        trace_configs.append(debug_tracing.create_trace_config())
 
     defaults = dict(
         cookie_jar=aiohttp.CookieJar(),
         raise_for_status=on_raise_for_status,  # type: ignore
         trace_configs=trace_configs,
+        rate_limiter=RateLimiter(),
+        metrics=SessionMetrics(),
     )
+    if pool_config:
+        defaults["connector"] = pool_config.create_connector()
+        defaults["timeout"] = pool_config.create_timeout()
 
     return CountingClientSession(**{**defaults, **kwargs})
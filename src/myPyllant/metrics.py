@@ -0,0 +1,394 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+from collections import Counter
+from collections.abc import Callable, Iterable
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+from yarl import URL
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+    from myPyllant.api import MyPyllantAPI
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+
+# Everything up to the API version is the same for all endpoints
+_API_PREFIX = re.compile(r"^.*?/v\d+(?=/)")
+_UUID = re.compile(
+    r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$"
+)
+
+
+def _is_id(segment: str) -> bool:
+    # System IDs, device UUIDs, serial numbers and zone indexes, but not names like `vrc700` or `germany-b2c`
+    return (
+        segment.isdigit()
+        or bool(_UUID.match(segment))
+        or (len(segment) >= 8 and sum(char.isdigit() for char in segment) >= 2)
+    )
+
+
+@lru_cache(maxsize=1024)
+def get_endpoint_template(url: str | URL) -> str:
+    """
+    Replaces IDs in the path of a URL with `{id}`, i.e. `/emf/v2/{id}/currentSystem`
+    """
+    path = _API_PREFIX.sub("", URL(url).path)
+    return "/".join("{id}" if _is_id(s) else s for s in path.split("/"))
+
+
+class EndpointMetrics:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes_received = 0
+        self.statuses: Counter[int] = Counter()
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS)
+
+    def observe_latency(self, seconds: float):
+        self.latency_sum += seconds
+        self.latency_max = max(self.latency_max, seconds)
+        for i, upper_bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= upper_bound:
+                self.latency_buckets[i] += 1
+                break
+
+    def stats(self) -> dict[str, Any]:
+        observed = sum(self.latency_buckets)
+        cumulative = 0
+        buckets = {}
+        for upper_bound, count in zip(LATENCY_BUCKETS, self.latency_buckets):
+            cumulative += count
+            buckets[upper_bound] = cumulative
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "bytes_received": self.bytes_received,
+            "statuses": dict(self.statuses),
+            "latency": {
+                "sum": self.latency_sum,
+                "mean": self.latency_sum / observed if observed else 0.0,
+                "max": self.latency_max,
+                "buckets": buckets,
+            },
+        }
+
+
+class SessionMetrics:
+    """
+    Collects request metrics by method and endpoint template, i.e. `GET /hem/{id}/mpc`
+
+    Latency is measured from sending the request until the response headers arrive,
+    without the time spent waiting for the rate limiter.
+    """
+
+    def __init__(self):
+        self.endpoints: dict[str, EndpointMetrics] = {}
+
+    def get_endpoint(self, method: str, url: str | URL) -> EndpointMetrics:
+        key = f"{method.upper()} {get_endpoint_template(url)}"
+        if key not in self.endpoints:
+            self.endpoints[key] = EndpointMetrics()
+        return self.endpoints[key]
+
+    def record_response(
+        self, method: str, url: str | URL, status: int | None, seconds: float
+    ):
+        """
+        Records a finished request, `status` is None if no response was received
+        """
+        endpoint = self.get_endpoint(method, url)
+        endpoint.count += 1
+        endpoint.observe_latency(seconds)
+        if status is None:
+            endpoint.errors += 1
+        else:
+            endpoint.statuses[status] += 1
+
+    def record_bytes(self, method: str, url: str | URL, size: int):
+        self.get_endpoint(method, url).bytes_received += size
+
+    def record_retry(self, method: str, url: str | URL):
+        self.get_endpoint(method, url).retries += 1
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """
+        Returns a snapshot of all metrics by endpoint
+        """
+        return {key: endpoint.stats() for key, endpoint in self.endpoints.items()}
+
+    def reset(self):
+        self.endpoints = {}
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class PrometheusWriter:
+    """
+    Collects samples by metric family and renders them in the Prometheus text format
+    """
+
+    def __init__(self):
+        self.families: dict[str, tuple[str, str, list[str]]] = {}
+
+    def add(
+        self,
+        name: str,
+        metric_type: str,
+        help_text: str,
+        value: float,
+        labels: dict[str, Any] | None = None,
+        suffix: str = "",
+    ):
+        if name not in self.families:
+            self.families[name] = (metric_type, help_text, [])
+        label_text = ",".join(
+            f'{key}="{_escape_label(label)}"' for key, label in (labels or {}).items()
+        )
+        sample = f"{name}{suffix}{{{label_text}}}" if label_text else f"{name}{suffix}"
+        self.families[name][2].append(f"{sample} {_format_value(value)}")
+
+    def render(self) -> str:
+        lines = []
+        for name, (metric_type, help_text, samples) in self.families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def _add_session_metrics(
+    writer: PrometheusWriter, account: dict[str, str], metrics: SessionMetrics
+):
+    for key, endpoint in metrics.endpoints.items():
+        method, template = key.split(" ", 1)
+        labels = {**account, "method": method, "endpoint": template}
+        for status, count in sorted(endpoint.statuses.items()):
+            writer.add(
+                "mypyllant_requests_total",
+                "counter",
+                "Requests that got a response, by status code",
+                count,
+                {**labels, "status": status},
+            )
+        writer.add(
+            "mypyllant_request_errors_total",
+            "counter",
+            "Requests that failed without a response",
+            endpoint.errors,
+            labels,
+        )
+        writer.add(
+            "mypyllant_request_retries_total",
+            "counter",
+            "Requests that were retried",
+            endpoint.retries,
+            labels,
+        )
+        writer.add(
+            "mypyllant_response_bytes_total",
+            "counter",
+            "Bytes received in response bodies",
+            endpoint.bytes_received,
+            labels,
+        )
+        histogram = endpoint.stats()["latency"]
+        for upper_bound, count in histogram["buckets"].items():
+            writer.add(
+                "mypyllant_request_duration_seconds",
+                "histogram",
+                "Time until the response headers arrived",
+                count,
+                {**labels, "le": _format_value(upper_bound)},
+                suffix="_bucket",
+            )
+        writer.add(
+            "mypyllant_request_duration_seconds",
+            "histogram",
+            "",
+            histogram["sum"],
+            labels,
+            suffix="_sum",
+        )
+        writer.add(
+            "mypyllant_request_duration_seconds",
+            "histogram",
+            "",
+            sum(endpoint.latency_buckets),
+            labels,
+            suffix="_count",
+        )
+
+
+def get_account_id(api: MyPyllantAPI) -> str:
+    """
+    Returns a hash of the username, to tell accounts apart without publishing their email addresses
+    """
+    return hashlib.sha256(api.username.encode()).hexdigest()[:12]
+
+
+def render_prometheus(
+    apis: Iterable[MyPyllantAPI],
+    account_label: Callable[[MyPyllantAPI], str] = get_account_id,
+) -> str:
+    """
+    Renders request, cache, token and rate limiter metrics of API instances in the Prometheus text format
+
+    Parameters:
+        apis: The API instances
+        account_label: Returns the `account` label of an API instance, defaults to a hash of its username
+    """
+    writer = PrometheusWriter()
+    for api in apis:
+        account = {"account": account_label(api)}
+        session = api.aiohttp_session
+        writer.add(
+            "mypyllant_session_requests_total",
+            "counter",
+            "Requests sent by the session, including logins",
+            session.request_count,
+            account,
+        )
+        if session.metrics:
+            _add_session_metrics(writer, account, session.metrics)
+        writer.add(
+            "mypyllant_coalesced_requests_total",
+            "counter",
+            "GET requests that shared the response of an identical request in flight",
+            api.coalesced_request_count,
+            account,
+        )
+        writer.add(
+            "mypyllant_token_refreshes_total",
+            "counter",
+            "Access token refreshes",
+            api.token_refresh_count,
+            account,
+        )
+        writer.add(
+            "mypyllant_unauthorized_replays_total",
+            "counter",
+            "Requests sent again after a 401 response",
+            api.unauthorized_replay_count,
+            account,
+        )
+        writer.add(
+            "mypyllant_skipped_writes_total",
+            "counter",
+            "Writes skipped because the value was already set",
+            api.skipped_write_count,
+            account,
+        )
+        if api.response_cache:
+            writer.add(
+                "mypyllant_response_cache_hits_total",
+                "counter",
+                "Responses served from the response cache",
+                api.response_cache.hits,
+                account,
+            )
+            writer.add(
+                "mypyllant_response_cache_misses_total",
+                "counter",
+                "Cacheable responses that weren't in the response cache",
+                api.response_cache.misses,
+                account,
+            )
+        if session.rate_limiter:
+            rate_limiter = session.rate_limiter
+            writer.add(
+                "mypyllant_rate_limiter_rate",
+                "gauge",
+                "Current requests per second allowed by the rate limiter",
+                rate_limiter.rate,
+                account,
+            )
+            writer.add(
+                "mypyllant_rate_limiter_queue_depth",
+                "gauge",
+                "Requests waiting for the rate limiter",
+                rate_limiter.queue_depth,
+                account,
+            )
+            writer.add(
+                "mypyllant_rate_limiter_waits_total",
+                "counter",
+                "Requests that had to wait for the rate limiter",
+                rate_limiter.wait_count,
+                account,
+            )
+            writer.add(
+                "mypyllant_rate_limiter_wait_seconds_total",
+                "counter",
+                "Time requests spent waiting for the rate limiter",
+                rate_limiter.wait_seconds,
+                account,
+            )
+            writer.add(
+                "mypyllant_rate_limiter_throttled_total",
+                "counter",
+                "Responses with status 429 or 503",
+                rate_limiter.throttled_count,
+                account,
+            )
+        for endpoint_name, circuit_breaker in api.circuit_breakers.items():
+            writer.add(
+                "mypyllant_circuit_breaker_open",
+                "gauge",
+                "1 while requests to the endpoint family fail fast",
+                int(circuit_breaker.is_open),
+                {**account, "endpoint": endpoint_name},
+            )
+    return writer.render()
+
+
+def create_metrics_app(
+    apis: Iterable[MyPyllantAPI] | Callable[[], Iterable[MyPyllantAPI]],
+    path: str = "/metrics",
+    account_label: Callable[[MyPyllantAPI], str] = get_account_id,
+) -> web.Application:
+    """
+    Creates an aiohttp.web application that serves `render_prometheus()` for scraping
+
+    Parameters:
+        apis: The API instances, or a function that returns them (i.e. `lambda: fleet.apis.values()`)
+        path: Path of the metrics endpoint
+        account_label: Returns the `account` label of an API instance, defaults to a hash of its username
+
+    Examples:
+        >>> runner = web.AppRunner(create_metrics_app([api]))
+        >>> await runner.setup()
+        >>> await web.TCPSite(runner, port=9464).start()
+    """
+    from aiohttp import web
+
+    async def handler(request: web.Request) -> web.Response:
+        body = render_prometheus(apis() if callable(apis) else apis, account_label)
+        return web.Response(
+            body=body.encode(), headers={"Content-Type": PROMETHEUS_CONTENT_TYPE}
+        )
+
+    app = web.Application()
+    app.router.add_get(path, handler)
+    return app
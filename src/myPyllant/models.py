@@ -3,7 +3,7 @@ from __future__ import annotations
 import calendar
 import datetime
 import logging
-from collections.abc import Iterator
+from collections.abc import Iterator, Sequence
 from dataclasses import asdict, fields, field
 from typing import TypeVar, Any, Iterable
 
@@ -74,6 +74,25 @@ class MyPyllantDataClass:
 
         return cls(**data)
 
+    def update_from_api(self, **data):
+        """
+        Updates fields in place from API values, with the same conversions as `from_api()`
+        """
+        dataclass_fields = {f.name: f for f in fields(self)}
+        timezone: datetime.tzinfo | None = getattr(self, "timezone", None)
+        for k, v in data.items():
+            if k not in dataclass_fields:
+                self.extra_fields[k] = v
+                continue
+            if (
+                v is not None
+                and "datetime.datetime" in str(dataclass_fields[k].type)
+                and timezone is not None
+            ):
+                v = datetime_parse(v, timezone)
+            # Validates the value like __init__ does, i.e. turns strings into enums
+            self.__pydantic_validator__.validate_assignment(self, k, v)  # type: ignore[attr-defined]
+
     def prepare_dict(self) -> dict:
         data = asdict(self)
         return prepare_field_value_for_dict(data)
@@ -175,6 +194,15 @@ class BaseTimeProgram(MyPyllantDataClass):
             if any([d == time_program_day for d in getattr(self, w)])
         ]
 
+    def has_same_schedule(self, other: BaseTimeProgram | None) -> bool:
+        """
+        Returns whether both time programs have the same slots on every weekday, ignoring meta info
+        """
+        return other is not None and all(
+            getattr(self, weekday) == getattr(other, weekday)
+            for weekday in self.weekday_names()
+        )
+
     def check_overlap(self):
         for weekday in self.weekday_names():
             day_list: list[BaseTimeProgramDay] = getattr(self, weekday)
@@ -742,6 +770,14 @@ class Device(MyPyllantDataClass):
         data["data"] = device_data
         return super().from_api(**data)
 
+    def update_from_api(self, **data):
+        if "data" in data:
+            for dd in data["data"]:
+                if "timezone" not in dd:
+                    dd["timezone"] = self.timezone
+            data["data"] = [DeviceData.from_api(**dd) for dd in data["data"]]
+        super().update_from_api(**data)
+
 
 @dataclass(config=config)
 class RoomTimeProgramDay(BaseTimeProgramDay):
@@ -972,11 +1008,6 @@ class System(MyPyllantDataClass):
             )
             for d in system.merge_object("dhw")
         ]
-        # TODO: Is it called ventilations everywhere, or just on VRC700 controllers?
-        if "ventilations" in system.configuration:
-            ventilation_key = "ventilations"
-        else:
-            ventilation_key = "ventilation"
         system.ventilation = [
             Ventilation.from_api(
                 system_id=system.id,
@@ -984,7 +1015,7 @@ class System(MyPyllantDataClass):
                 timezone=system.timezone,
                 **d,
             )
-            for d in system.merge_object(ventilation_key)
+            for d in system.merge_object(system.ventilation_key)
         ]
         system.devices = [
             Device.from_api(
@@ -1002,6 +1033,60 @@ class System(MyPyllantDataClass):
         ]
         return system
 
+    @property
+    def ventilation_key(self) -> str:
+        # TODO: Is it called ventilations everywhere, or just on VRC700 controllers?
+        if "ventilations" in self.configuration:
+            return "ventilations"
+        return "ventilation"
+
+    def update_state(
+        self,
+        state: dict,
+        properties: dict,
+        current_system: dict,
+        mpc: dict | None = None,
+    ):
+        """
+        Patches the state of zones, circuits, hot water, ventilation and devices into the existing objects
+
+        The configuration, including time programs, is kept as is.
+        """
+        self.state = state
+        self.properties = properties
+        self.current_system = current_system
+        if mpc is not None:
+            self.mpc = mpc
+        self.extra_fields = self.merge_extra_fields()
+        objects: list[
+            tuple[str, Sequence[Zone | Circuit | DomesticHotWater | Ventilation]]
+        ] = [
+            ("zones", self.zones),
+            ("circuits", self.circuits),
+            ("dhw", self.domestic_hot_water),
+            (self.ventilation_key, self.ventilation),
+        ]
+        for obj_name, existing in objects:
+            by_index = {o.index: o for o in existing}
+            for values in self.state.get(obj_name, []):
+                if values.get("index") in by_index:
+                    by_index[values["index"]].update_from_api(**values)
+
+        devices = {d.device_uuid: d for d in self.devices}
+        for device_type, values in self.raw_devices:
+            if values["device_uuid"] in devices:
+                devices[values["device_uuid"]].update_from_api(**values)
+            else:
+                self.devices.append(
+                    Device.from_api(
+                        system_id=self.id,
+                        timezone=self.timezone,
+                        type=device_type,
+                        brand=self.brand,
+                        **values,
+                    )
+                )
+
     def apply_diagnostic(self, device):
         dtc = self.diagnostic_trouble_codes_by_serial_number(
             device["device_serial_number"]
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from collections.abc import Callable
+from dataclasses import dataclass, fields
+from typing import Any
+
+from myPyllant.api import MyPyllantAPI
+from myPyllant.enums import CircuitState
+from myPyllant.models import System
+
+logger = logging.getLogger(__name__)
+
+# Data classes that follow the activity of a system
+ADAPTIVE_DATA_CLASSES = ("mpc", "state")
+
+
+@dataclass(frozen=True)
+class PollingIntervals:
+    """
+    Seconds between updates of each data class, None to never update it
+
+    Parameters:
+        mpc: Current power consumption of the devices
+        state: Temperatures, special functions, circuit states etc., see `MyPyllantAPI.refresh_state()`
+        rts: On/off cycles and operation time of the devices
+        diagnostic_trouble_codes: Trouble codes of the devices
+        eebus: EEBUS information
+        ambisense_capability: Whether the system is ambisense capable
+        configuration: Fetches all systems again with `MyPyllantAPI.get_systems()`, to update operation modes,
+            setpoints, time programs and properties that were changed elsewhere
+    """
+
+    mpc: float | None = 30
+    state: float | None = 60
+    rts: float | None = 60 * 60
+    diagnostic_trouble_codes: float | None = 60 * 60
+    eebus: float | None = 60 * 60 * 24
+    ambisense_capability: float | None = 60 * 60 * 24
+    configuration: float | None = 60 * 60
+
+    def enabled(self) -> dict[str, float]:
+        return {
+            f.name: getattr(self, f.name)
+            for f in fields(self)
+            if getattr(self, f.name) is not None
+        }
+
+
+class PollingCoordinator:
+    """
+    Keeps the systems of an account up to date, polling each data class at its own interval
+
+    Power consumption and state are polled faster while a circuit is heating or cooling, and slower while
+    all of them are in standby. Every interval is jittered, so polls of many systems don't happen at once.
+
+    Parameters:
+        api: The logged in API
+        intervals: Seconds between updates of each data class
+        active_factor: Multiplies the interval of power consumption and state while a circuit is heating or cooling
+        idle_factor: Multiplies the interval of power consumption and state while all circuits are in standby
+        jitter: Intervals are randomly changed by up to this fraction, i.e. 0.1 for ±10%
+        get_systems_kwargs: Passed on to `MyPyllantAPI.get_systems()`, i.e. `include_ambisense_rooms`
+
+    Examples:
+        >>> async with PollingCoordinator(api) as coordinator:
+        >>>     coordinator.add_listener(lambda system, data_class: print(system.water_pressure))
+        >>>     await asyncio.sleep(3600)
+    """
+
+    def __init__(
+        self,
+        api: MyPyllantAPI,
+        intervals: PollingIntervals = PollingIntervals(),
+        active_factor: float = 0.5,
+        idle_factor: float = 2.0,
+        jitter: float = 0.1,
+        **get_systems_kwargs,
+    ) -> None:
+        self.api = api
+        self.intervals = intervals
+        self.active_factor = active_factor
+        self.idle_factor = idle_factor
+        self.jitter = jitter
+        self.get_systems_kwargs = get_systems_kwargs
+        self.systems: dict[str, System] = {}
+        self.poll_count = 0
+        self.error_count = 0
+        self._listeners: list[Callable[[System, str], Any]] = []
+        self._tasks: list[asyncio.Task] = []
+
+    async def __aenter__(self) -> PollingCoordinator:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args, **kwargs) -> None:
+        await self.stop()
+
+    def add_listener(
+        self, listener: Callable[[System, str], Any]
+    ) -> Callable[[], None]:
+        """
+        Calls `listener` with the system and the name of the data class after every update
+
+        Returns:
+            A function that removes the listener
+        """
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    async def start(self):
+        """
+        Fetches all systems and starts polling them, stopping a previous start first
+        """
+        await self.stop()
+        self.systems = await self._get_systems()
+        for system_id in self.systems:
+            self._start_system(system_id)
+        if self.intervals.configuration is not None:
+            self._tasks.append(asyncio.create_task(self._configuration_poll_loop()))
+
+    async def _get_systems(self) -> dict[str, System]:
+        enabled = self.intervals.enabled()
+        get_systems_kwargs = {
+            "include_mpc": "mpc" in enabled,
+            "include_rts": "rts" in enabled,
+            "include_diagnostic_trouble_codes": "diagnostic_trouble_codes" in enabled,
+            "include_eebus": "eebus" in enabled,
+            "include_ambisense_capability": "ambisense_capability" in enabled,
+            **self.get_systems_kwargs,
+        }
+        return {
+            system.id: system
+            async for system in self.api.get_systems(**get_systems_kwargs)
+        }
+
+    def _start_system(self, system_id: str):
+        self._tasks += [
+            asyncio.create_task(self._poll_loop(system_id, data_class))
+            for data_class in self.intervals.enabled()
+            # The configuration is updated for all systems at once
+            if data_class != "configuration"
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def is_active(self, system: System) -> bool | None:
+        """
+        Returns whether a circuit is heating or cooling, or None if the circuit states are unknown
+        """
+        states = [c.circuit_state for c in system.circuits if c.circuit_state]
+        if not states:
+            return None
+        return any(s in (CircuitState.HEATING, CircuitState.COOLING) for s in states)
+
+    def get_interval(self, system: System | None, data_class: str) -> float:
+        """
+        Returns the seconds until the next update of a data class, adapted to the activity of the system and jittered
+        """
+        interval: float = getattr(self.intervals, data_class)
+        if system is not None and data_class in ADAPTIVE_DATA_CLASSES:
+            active = self.is_active(system)
+            if active:
+                interval *= self.active_factor
+            elif active is False:
+                interval *= self.idle_factor
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def poll(self, system: System, data_class: str):
+        """
+        Updates one data class of a system in place and notifies the listeners
+        """
+        if data_class == "state":
+            await self.api.refresh_state(system, include_mpc=False)
+        elif data_class == "mpc":
+            system.mpc = await self.api.get_mpc(system)
+            for device in system.devices:
+                device.mpc = system.mpc_by_device_uuid(device.device_uuid)
+        elif data_class == "rts":
+            system.rts = await self.api.get_rts(system)
+            for device in system.devices:
+                device.rts_statistics = system.rts_statistics_by_device_uuid(
+                    device.device_uuid
+                )
+        elif data_class == "diagnostic_trouble_codes":
+            system.diagnostic_trouble_codes = (
+                await self.api.get_diagnostic_trouble_codes(system)
+            )
+            for device in system.devices:
+                device.diagnostic_trouble_codes = (
+                    system.diagnostic_trouble_codes_by_serial_number(
+                        device.device_serial_number
+                    )
+                )
+        elif data_class == "eebus":
+            system.eebus = await self.api.get_eebus(system)
+        elif data_class == "ambisense_capability":
+            system.ambisense_capability = await self.api.get_ambisense_capability(
+                system
+            )
+        else:
+            raise ValueError(f"Unknown data class {data_class}")
+        self.poll_count += 1
+        for listener in list(self._listeners):
+            listener(system, data_class)
+
+    async def poll_configuration(self):
+        """
+        Fetches all systems again and replaces the polled systems, then notifies the listeners
+
+        Systems that were added to the account are polled from now on, removed systems aren't polled anymore.
+        """
+        systems = await self._get_systems()
+        added = systems.keys() - self.systems.keys()
+        self.systems = systems
+        for system_id in added:
+            self._start_system(system_id)
+        self.poll_count += 1
+        for system in systems.values():
+            for listener in list(self._listeners):
+                listener(system, "configuration")
+
+    async def _poll_loop(self, system_id: str, data_class: str):
+        while system_id in self.systems:
+            await asyncio.sleep(self.get_interval(self.systems[system_id], data_class))
+            # The system might have been replaced or removed in the meantime
+            system = self.systems.get(system_id)
+            if system is None:
+                break
+            try:
+                await self.poll(system, data_class)
+            except Exception:
+                self.error_count += 1
+                logger.warning(
+                    "Couldn't update %s of %s", data_class, system_id, exc_info=True
+                )
+
+    async def _configuration_poll_loop(self):
+        while True:
+            await asyncio.sleep(self.get_interval(None, "configuration"))
+            try:
+                await self.poll_configuration()
+            except Exception:
+                self.error_count += 1
+                logger.warning("Couldn't update the configuration", exc_info=True)
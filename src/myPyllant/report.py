@@ -5,8 +5,11 @@ import asyncio
 import logging
 import sys
 from datetime import date
+from pathlib import Path
 
 from myPyllant.api import MyPyllantAPI
+from myPyllant.cache import JSONMetaInfoStore
+from myPyllant.token_store import FileTokenStore
 from myPyllant.utils import add_default_parser_args
 
 parser = argparse.ArgumentParser(description="Export data from myVaillant API.")
@@ -18,13 +21,39 @@ parser.add_argument(
     default=date.today().year,
     required=False,
 )
+parser.add_argument(
+    "--cache-dir",
+    help="Directory where the login session, control identifiers and time zones are cached between runs",
+    required=False,
+)
 parser.add_argument(
     "-v", "--verbose", help="increase output verbosity", action="store_true"
 )
 
 
-async def main(user, password, brand, year: int, country=None, write_results=True):
-    async with MyPyllantAPI(user, password, brand, country) as api:
+async def main(
+    user,
+    password,
+    brand,
+    year: int,
+    country=None,
+    write_results=True,
+    cache_dir=None,
+):
+    meta_info_store = (
+        JSONMetaInfoStore(Path(cache_dir) / "meta-info.json") if cache_dir else None
+    )
+    token_store = (
+        FileTokenStore(Path(cache_dir) / "sessions.json") if cache_dir else None
+    )
+    async with MyPyllantAPI(
+        user,
+        password,
+        brand,
+        country,
+        meta_info_store=meta_info_store,
+        token_store=token_store,
+    ) as api:
         results = []
         async for system in api.get_systems():
             reports = api.get_yearly_reports(system, year)
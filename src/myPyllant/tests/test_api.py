@@ -1,11 +1,16 @@
+import asyncio
+import copy
 import logging
+import re
 from datetime import datetime, timedelta, tzinfo, timezone
 
 import pytest
+from aiohttp import ClientResponseError
+from aioresponses import CallbackResult, aioresponses
 from freezegun import freeze_time
 
 from ..api import MyPyllantAPI
-from ..http_client import RealmInvalid
+from ..http_client import CircuitBreaker, RealmInvalid, RetryPolicy
 from ..models import (
     Device,
     DeviceData,
@@ -91,6 +96,43 @@ async def test_refresh_token(mypyllant_aioresponses, mocked_api) -> None:
         await mocked_api.aiohttp_session.close()
 
 
+async def test_refresh_token_once(mypyllant_aioresponses, mocked_api) -> None:
+    with mypyllant_aioresponses() as aio:
+        # Holding the lock makes all callers wait, like for a slow refresh
+        async with mocked_api._token_lock:
+            tasks = [asyncio.create_task(mocked_api.refresh_token()) for _ in range(5)]
+            await asyncio.sleep(0)
+        sessions = await asyncio.gather(*tasks)
+        assert all(session is sessions[0] for session in sessions)
+        assert mocked_api.token_refresh_count == 1
+        token_calls = [
+            len(calls)
+            for (_, url), calls in aio.requests.items()
+            if "token" in str(url)
+        ]
+        assert token_calls == [1]
+        await mocked_api.aiohttp_session.close()
+
+
+async def test_auto_refresh_token(mypyllant_aioresponses) -> None:
+    with mypyllant_aioresponses():
+        async with MyPyllantAPI(
+            "test@example.com", "test", "vaillant", "germany", auto_refresh_token=True
+        ) as api:
+            assert 3500 < api.get_token_refresh_delay() < 3600
+            await api.stop_token_refresh()
+            api.oauth_session_expires = datetime.now(timezone.utc) + timedelta(
+                seconds=0.1
+            )
+            task = api.start_token_refresh()
+            while api.token_refresh_count == 0:
+                await asyncio.sleep(0.01)
+            assert api.oauth_session_expires > datetime.now(timezone.utc) + timedelta(
+                minutes=59
+            )
+        assert task.cancelled()
+
+
 @pytest.mark.parametrize("test_data", list_test_data())
 async def test_systems(
     mypyllant_aioresponses, mocked_api: MyPyllantAPI, test_data
@@ -134,6 +176,16 @@ async def test_timezone_caching(
         )
 
 
+async def test_homes_prefetch(mypyllant_aioresponses, mocked_api: MyPyllantAPI) -> None:
+    test_data = load_test_data(DATA_DIR / "two_systems")
+    system_ids = [h["systemId"] for h in test_data["homes"]]
+    with mypyllant_aioresponses(test_data) as _:
+        await anext(mocked_api.get_homes(prefetch_control_identifiers=True))
+        assert set(mocked_api.time_zones) == set(system_ids)
+        assert set(mocked_api.control_identifiers) == set(system_ids)
+        await mocked_api.aiohttp_session.close()
+
+
 @pytest.mark.parametrize("test_data", list_test_data())
 async def test_meta_info(
     mypyllant_aioresponses, mocked_api: MyPyllantAPI, test_data
@@ -304,6 +356,299 @@ async def test_dhw_setpoint(
         await mocked_api.aiohttp_session.close()
 
 
+@pytest.mark.parametrize(
+    "max_concurrent_requests,expected_peak", [(1, 1), (2, 2), (10, 4)]
+)
+async def test_get_systems_concurrency(
+    mypyllant_aioresponses,
+    mocked_api: MyPyllantAPI,
+    max_concurrent_requests,
+    expected_peak,
+) -> None:
+    test_data = load_test_data(DATA_DIR / "vrc700")
+    in_flight = peak = 0
+
+    async def slow_request(*args, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {}
+
+    for name in ("get_rts", "get_mpc", "get_energy_management", "get_eebus"):
+        setattr(mocked_api, name, slow_request)
+
+    with mypyllant_aioresponses(test_data) as _:
+        system = await anext(
+            mocked_api.get_systems(
+                include_rts=True,
+                include_mpc=True,
+                include_energy_management=True,
+                include_eebus=True,
+                max_concurrent_requests=max_concurrent_requests,
+            )
+        )
+        assert isinstance(system, System)
+        assert system.mpc == {}
+        assert peak == expected_peak
+        await mocked_api.aiohttp_session.close()
+
+
+async def test_get_systems_concurrent_homes(
+    mypyllant_aioresponses, mocked_api: MyPyllantAPI
+) -> None:
+    test_data = load_test_data(DATA_DIR / "two_systems")
+    system_ids = [h["systemId"] for h in test_data["homes"]]
+    get_system = mocked_api._get_system
+
+    async def slow_first_system(home, *args, **kwargs):
+        if home.system_id == system_ids[0]:
+            await asyncio.sleep(0.05)
+        return await get_system(home, *args, **kwargs)
+
+    mocked_api._get_system = slow_first_system  # type: ignore
+    with mypyllant_aioresponses(test_data) as _:
+        in_order = [s.id async for s in mocked_api.get_systems(max_concurrent_homes=2)]
+        completed = [
+            s.id
+            async for s in mocked_api.get_systems(
+                max_concurrent_homes=2, as_completed=True
+            )
+        ]
+        assert in_order == system_ids
+        assert completed == system_ids[::-1]
+        await mocked_api.aiohttp_session.close()
+
+
+async def test_retry_transient_errors(mocked_api: MyPyllantAPI) -> None:
+    mocked_api.retry_policy = RetryPolicy(attempts=3, backoff=0.001)
+    url = "https://api.vaillant-group.com/test"
+    with aioresponses() as aio:
+        aio.get(url, status=503)
+        aio.get(url, exception=asyncio.TimeoutError())
+        aio.get(url, status=200, payload={"ok": True})
+        result = await mocked_api._request("GET", url, response_type="json")
+        assert result == {"ok": True}
+        stats = mocked_api.aiohttp_session.stats()["GET /test"]
+        assert stats["retries"] == 2
+        assert stats["errors"] == 1
+        assert stats["statuses"] == {503: 1, 200: 1}
+
+        # Writes are not idempotent and never retried
+        aio.patch(url, status=503)
+        with pytest.raises(ClientResponseError):
+            await mocked_api._request("PATCH", url)
+        # Client errors are not transient
+        aio.get(url, status=404)
+        with pytest.raises(ClientResponseError):
+            await mocked_api._request("GET", url)
+    await mocked_api.aiohttp_session.close()
+
+
+async def test_replay_unauthorized(mocked_api: MyPyllantAPI) -> None:
+    url = re.compile(r".*/systems/system\d$")
+
+    async def callback(url, headers, **kwargs):
+        # Requests overlap, so they all fail with the expired token
+        await asyncio.sleep(0.01)
+        if headers["Authorization"] == "Bearer access_token":
+            return CallbackResult(status=401, reason="Unauthorized")
+        return CallbackResult(payload={"url": str(url)})
+
+    with aioresponses() as aio:
+        aio.get(url, callback=callback, repeat=True)
+        aio.post(
+            re.compile(r".*openid-connect/token$"),
+            payload={
+                "expires_in": 3600,
+                "access_token": "new_access_token",
+                "refresh_token": "refresh_token",
+            },
+            repeat=True,
+        )
+        results = await asyncio.gather(
+            *[
+                mocked_api._request(
+                    "GET", f"https://example.com/systems/system{i}", "json"
+                )
+                for i in range(3)
+            ]
+        )
+        assert [r["url"] for r in results] == [
+            f"https://example.com/systems/system{i}" for i in range(3)
+        ]
+        assert mocked_api.token_refresh_count == 1
+        assert mocked_api.unauthorized_replay_count == 3
+
+        # A request that's still unauthorized after renewing the token fails
+        mocked_api.oauth_session = {**mocked_api.oauth_session, "access_token": "x"}
+        aio.patch(
+            "https://example.com/systems/system0",
+            status=401,
+            reason="Unauthorized",
+            repeat=True,
+        )
+        with pytest.raises(ClientResponseError):
+            await mocked_api._request("PATCH", "https://example.com/systems/system0")
+        assert mocked_api.token_refresh_count == 2
+    await mocked_api.aiohttp_session.close()
+
+
+async def test_circuit_breaker(mocked_api: MyPyllantAPI) -> None:
+    mocked_api.retry_policy = RetryPolicy(attempts=1)
+    mocked_api.circuit_breakers["mpc"] = CircuitBreaker(
+        failure_threshold=2, reset_timeout=60
+    )
+    with aioresponses() as aio:
+        aio.get(re.compile(r".*/mpc$"), status=500, repeat=True)
+        assert await mocked_api.get_mpc("system") == {"devices": []}
+        assert await mocked_api.get_mpc("system") == {"devices": []}
+        assert mocked_api.circuit_breakers["mpc"].is_open
+        assert mocked_api.aiohttp_session.request_count == 2
+        # The open circuit fails fast without sending a request
+        assert await mocked_api.get_mpc("system") == {"devices": []}
+        assert mocked_api.aiohttp_session.request_count == 2
+
+        with freeze_time(datetime.now() + timedelta(seconds=61)):
+            assert not mocked_api.circuit_breakers["mpc"].is_open
+    await mocked_api.aiohttp_session.close()
+
+
+async def test_coalesce_concurrent_requests(
+    mypyllant_aioresponses, mocked_api: MyPyllantAPI
+) -> None:
+    test_data = load_test_data(DATA_DIR / "vrc700")
+    system_id = test_data["homes"][0]["systemId"]
+    with mypyllant_aioresponses(test_data) as _:
+        time_zones = await asyncio.gather(
+            *(mocked_api.get_time_zone(system_id) for _ in range(5))
+        )
+        assert all(isinstance(tz, tzinfo) for tz in time_zones)
+        assert mocked_api.aiohttp_session.request_count == 1
+        assert mocked_api.coalesced_request_count == 4
+
+        # Finished requests aren't shared
+        mocked_api.time_zones = {}
+        await mocked_api.get_time_zone(system_id)
+        assert mocked_api.aiohttp_session.request_count == 2
+        assert not mocked_api._in_flight_requests
+    await mocked_api.aiohttp_session.close()
+
+
+async def test_idempotent_writes(
+    mypyllant_aioresponses, mocked_api: MyPyllantAPI
+) -> None:
+    def count_writes(aio) -> int:
+        return sum(
+            len(requests)
+            for (method, _), requests in aio.requests.items()
+            if method != "GET"
+        )
+
+    test_data = load_test_data(DATA_DIR / "vrc700")
+    with mypyllant_aioresponses(test_data) as aio:
+        mocked_api.idempotent_writes = True
+        system = await anext(mocked_api.get_systems())
+        zone = system.zones[0]
+        circuit = system.circuits[0]
+        mode = zone.heating.operation_mode_heating
+
+        # Writes are sent without idempotent writes
+        mocked_api.idempotent_writes = False
+        await mocked_api.set_zone_operating_mode(zone, mode)
+        assert count_writes(aio) == 1
+
+        mocked_api.idempotent_writes = True
+        await mocked_api.set_zone_operating_mode(zone, str(mode))
+        await mocked_api.set_circuit_heating_curve(circuit, circuit.heating_curve)
+        time_program = copy.deepcopy(zone.heating.time_program_heating)
+        time_program.meta_info = None
+        await mocked_api.set_zone_time_program(zone, "heating", time_program)
+        assert count_writes(aio) == 1
+        assert mocked_api.skipped_write_count == 3
+
+        await mocked_api.set_circuit_heating_curve(circuit, circuit.heating_curve + 0.1)
+        assert count_writes(aio) == 2
+        # The written value is known now
+        await mocked_api.set_circuit_heating_curve(circuit, circuit.heating_curve)
+        assert count_writes(aio) == 2
+        assert mocked_api.skipped_write_count == 4
+
+        # Invalid arguments are still rejected
+        with pytest.raises(ValueError):
+            await mocked_api.set_zone_time_program(zone, "invalid", time_program)
+        with pytest.raises(ValueError):
+            await mocked_api.set_set_back_temperature(zone, 15.0, "invalid")
+    await mocked_api.aiohttp_session.close()
+
+
+async def test_idempotent_writes_time_program_in_place(
+    mypyllant_aioresponses, mocked_api: MyPyllantAPI
+) -> None:
+    test_data = load_test_data(DATA_DIR / "vrc700")
+    with mypyllant_aioresponses(test_data) as aio:
+        mocked_api.idempotent_writes = True
+        system = await anext(mocked_api.get_systems())
+        zone = system.zones[0]
+        # Edits the time program of the zone in place
+        await mocked_api.set_time_program_temperature(zone, "heating", 22.5)
+        await mocked_api.set_time_program_temperature(zone, "heating", 22.5)
+        assert zone.heating.time_program_heating.monday[0].setpoint == 22.5
+        patch_requests = [
+            request
+            for (method, _), requests in aio.requests.items()
+            for request in requests
+            if method == "PATCH"
+        ]
+        assert len(patch_requests) == 1
+        assert mocked_api.skipped_write_count == 1
+    await mocked_api.aiohttp_session.close()
+
+
+async def test_refresh_state(mypyllant_aioresponses, mocked_api: MyPyllantAPI) -> None:
+    test_data = load_test_data(DATA_DIR / "vrc700")
+    system_id = test_data["homes"][0]["systemId"]
+    with mypyllant_aioresponses(test_data) as _:
+        system = await anext(mocked_api.get_systems(include_mpc=True))
+        zone = system.zones[0]
+        time_program = zone.heating.time_program_heating
+        device = system.devices[0]
+        request_count = mocked_api.aiohttp_session.request_count
+
+        system_json = copy.deepcopy(test_data[system_id]["system"])
+        system_json["state"]["system"]["systemWaterPressure"] = 1.5
+        system_json["state"]["zones"][0]["currentRoomTemperature"] = 23.5
+        system_json["state"]["zones"][0]["currentSpecialFunction"] = "QUICK_VETO"
+        test_data[system_id]["system"] = system_json
+
+        assert await mocked_api.refresh_state(system) is system
+        assert mocked_api.aiohttp_session.request_count == request_count + 3
+        assert system.water_pressure == 1.5
+        assert system.zones[0] is zone
+        assert zone.current_room_temperature == 23.5
+        assert zone.current_special_function == ZoneCurrentSpecialFunction.QUICK_VETO
+        assert zone.heating.time_program_heating is time_program
+        assert system.devices[0] is device
+    await mocked_api.aiohttp_session.close()
+
+
+@pytest.mark.parametrize("test_data", list_test_data())
+async def test_refresh_state_unchanged(
+    mypyllant_aioresponses, mocked_api: MyPyllantAPI, test_data
+) -> None:
+    with mypyllant_aioresponses(test_data) as _:
+        system = await get_system_or_skip(mocked_api, include_mpc=True)
+        system_dict = system.prepare_dict()
+        await mocked_api.refresh_state(system)
+        assert system.prepare_dict() == system_dict
+        for device in system.devices:
+            for device_data in device.data:
+                assert device_data.data_from is not None
+                assert device_data.data_to is not None
+        await mocked_api.aiohttp_session.close()
+
+
 async def test_no_system(mypyllant_aioresponses, mocked_api: MyPyllantAPI) -> None:
     test_data = load_test_data(DATA_DIR / "no_system")
     with mypyllant_aioresponses(test_data) as _:
@@ -313,6 +658,44 @@ async def test_no_system(mypyllant_aioresponses, mocked_api: MyPyllantAPI) -> No
         await mocked_api.aiohttp_session.close()
 
 
+async def test_system_endpoints(
+    mypyllant_aioresponses, mocked_api: MyPyllantAPI, mocker
+) -> None:
+    headers = mocked_api.get_authorized_headers()
+    assert mocked_api.get_authorized_headers() == headers
+    # Changing the returned headers doesn't change the cached ones
+    headers.update({"Authorization": "changed"})
+    assert mocked_api.get_authorized_headers()["Authorization"] != "changed"
+
+    test_data = load_test_data(DATA_DIR / "vrc700")
+    with mypyllant_aioresponses(test_data) as aio:
+        system = await anext(mocked_api.get_systems())
+        endpoints = await mocked_api.get_system_endpoints(system)
+        assert endpoints.control_identifier == system.control_identifier
+        assert endpoints.system_api_base.endswith(f"/systems/{system.id}")
+
+        spy = mocker.spy(mocked_api, "get_control_identifier")
+        for _ in range(2):
+            await mocked_api.set_set_back_temperature(system.zones[0], 15.0)
+        assert str(list(aio.requests.keys())[-1][1]).startswith(
+            endpoints.system_api_base
+        )
+        await mocked_api.set_circuit_heating_curve(system.circuits[0], 1.2)
+        await mocked_api.set_circuit_heat_demand_limited_by_outside_temperature(
+            system.circuits[0], 20.0
+        )
+        assert spy.call_count == 0
+
+        # Resolved again when the control identifier changes
+        mocked_api.control_identifiers[system.id] = "tli"
+        endpoints = await mocked_api.get_system_endpoints(system)
+        assert endpoints.system_api_base.endswith(f"/systems/{system.id}/tli")
+
+    mocked_api.oauth_session = {**mocked_api.oauth_session, "access_token": "new"}
+    assert mocked_api.get_authorized_headers()["Authorization"] == "Bearer new"
+    await mocked_api.aiohttp_session.close()
+
+
 async def test_vrc700_operating_mode(
     mypyllant_aioresponses, mocked_api: MyPyllantAPI
 ) -> None:
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+
+from freezegun import freeze_time
+
+from ..api import MyPyllantAPI
+from ..cache import MISSING, JSONMetaInfoStore, MemoryResponseCache
+from ..const import CACHE_TTL
+from .generate_test_data import DATA_DIR
+from .utils import load_test_data
+
+
+def test_cache_ttls() -> None:
+    cache = MemoryResponseCache()
+    base = (
+        "https://api.vaillant-group.com/service-connected-control/end-user-app-api/v1"
+    )
+    assert cache.get_ttl(f"{base}/homes") == CACHE_TTL
+    assert cache.get_ttl(f"{base}/systems/1/meta-info/time-zone") == CACHE_TTL
+    assert cache.get_ttl(f"{base}/emf/v2/1/currentSystem") == 0
+    assert cache.get_ttl(f"{base}/hem/1/mpc") == 0
+    assert cache.get_ttl(f"{base}/systems/1/tli") == 0
+
+
+async def test_cache_expiry() -> None:
+    cache = MemoryResponseCache()
+    assert await cache.get("key") is MISSING
+    await cache.set("key", {"a": 1}, 60)
+    assert await cache.get("key") == {"a": 1}
+    with freeze_time(datetime.now() + timedelta(seconds=61)):
+        assert await cache.get("key") is MISSING
+    assert cache.hits == 1
+    assert cache.misses == 2
+
+    await cache.set("key", None, 60)
+    assert await cache.get("key") is None
+    await cache.invalidate("ke")
+    assert await cache.get("key") is MISSING
+
+
+async def test_api_response_cache(mypyllant_aioresponses, mocked_api: MyPyllantAPI):
+    mocked_api.response_cache = MemoryResponseCache()
+    test_data = load_test_data(DATA_DIR / "vrc700")
+    with mypyllant_aioresponses(test_data) as aio:
+        for _ in range(3):
+            mocked_api.time_zones = {}
+            mocked_api.control_identifiers = {}
+            async for _ in mocked_api.get_systems(include_mpc=True):
+                pass
+
+        urls = [str(url) for _, url in aio.requests.keys()]
+        homes_calls = [
+            len(calls)
+            for (_, url), calls in aio.requests.items()
+            if "homes" in str(url)
+        ]
+        mpc_calls = [
+            len(calls) for (_, url), calls in aio.requests.items() if "mpc" in str(url)
+        ]
+        assert any("time-zone" in url for url in urls)
+        assert homes_calls == [1]
+        assert mpc_calls == [3]
+        assert mocked_api.response_cache.hits == 6
+        assert mocked_api.response_cache.hit_rate > 0
+    await mocked_api.aiohttp_session.close()
+
+
+def test_json_meta_info_store(tmp_path) -> None:
+    path = tmp_path / "cache" / "meta-info.json"
+    store = JSONMetaInfoStore(path, ttl=60)
+    assert store.load("time_zones") == {}
+    store.set("time_zones", "system", "Europe/Berlin")
+    assert path.exists()
+
+    store = JSONMetaInfoStore(path, ttl=60)
+    assert store.load("time_zones") == {"system": "Europe/Berlin"}
+    with freeze_time(datetime.now() + timedelta(seconds=61)):
+        assert store.load("time_zones") == {}
+
+    path.write_text("not json")
+    assert JSONMetaInfoStore(path).load("time_zones") == {}
+
+
+async def test_api_meta_info_store(mypyllant_aioresponses, tmp_path) -> None:
+    test_data = load_test_data(DATA_DIR / "vrc700")
+    path = tmp_path / "meta-info.json"
+    with mypyllant_aioresponses(test_data) as aio:
+        async with MyPyllantAPI(
+            "test@example.com",
+            "test",
+            "vaillant",
+            "germany",
+            meta_info_store=JSONMetaInfoStore(path),
+        ) as api:
+            system = await anext(api.get_systems())
+        assert api.control_identifiers
+        assert api.time_zones
+
+        async with MyPyllantAPI(
+            "test@example.com",
+            "test",
+            "vaillant",
+            "germany",
+            meta_info_store=JSONMetaInfoStore(path),
+        ) as api:
+            assert api.control_identifiers == {system.id: system.control_identifier}
+            await api.get_time_zone(system)
+
+        meta_info_calls = [
+            len(calls)
+            for (_, url), calls in aio.requests.items()
+            if "meta-info" in str(url)
+        ]
+        assert meta_info_calls == [1, 1]
@@ -0,0 +1,63 @@
+import pytest
+
+from ..api import MyPyllantAPI
+from ..fleet import FleetAccount, MyPyllantFleet
+from .generate_test_data import DATA_DIR
+from .utils import load_test_data
+
+
+async def test_fleet(mypyllant_aioresponses, monkeypatch) -> None:
+    login = MyPyllantAPI.login
+
+    async def login_or_fail(self):
+        if self.username == "broken@example.com":
+            raise ValueError("Login failed")
+        await login(self)
+
+    monkeypatch.setattr(MyPyllantAPI, "login", login_or_fail)
+    accounts = [
+        FleetAccount(f"{name}@example.com", "test", "vaillant", "germany")
+        for name in ("first", "second", "broken")
+    ]
+    test_data = load_test_data(DATA_DIR / "two_systems")
+    with mypyllant_aioresponses(test_data):
+        async with MyPyllantFleet(accounts, rate_limit=100) as fleet:
+            assert list(fleet.apis) == ["first@example.com", "second@example.com"]
+            assert isinstance(fleet.login_errors["broken@example.com"], ValueError)
+            connector = fleet.connector
+            for api in fleet.apis.values():
+                assert api.aiohttp_session.connector is connector
+                assert api.aiohttp_session.rate_limiter.parent is fleet.rate_limiter
+
+            systems = [
+                (api.username, system.id)
+                async for api, system in fleet.iter_all_systems(max_concurrent_homes=2)
+            ]
+            assert len(systems) == 4
+            assert {username for username, _ in systems} == set(fleet.apis)
+            assert fleet.request_count > 0
+        assert connector.closed
+        assert not fleet.apis
+
+
+async def test_fleet_account_failure(mypyllant_aioresponses) -> None:
+    test_data = load_test_data(DATA_DIR / "two_systems")
+    accounts = [FleetAccount("test@example.com", "test", "vaillant", "germany")]
+    with mypyllant_aioresponses(test_data):
+        async with MyPyllantFleet(accounts) as fleet:
+            api = fleet.apis["test@example.com"]
+
+            async def get_systems(**kwargs):
+                raise ValueError("Failed")
+                yield
+
+            with pytest.MonkeyPatch.context() as monkeypatch:
+                monkeypatch.setattr(api, "get_systems", get_systems)
+                assert [s async for s in fleet.iter_all_systems()] == []
+
+
+@pytest.mark.parametrize("key", ["connector", "session"])
+def test_fleet_api_arguments(key) -> None:
+    accounts = [FleetAccount("test@example.com", "test", "vaillant", "germany")]
+    with pytest.raises(ValueError, match=key):
+        MyPyllantFleet(accounts, **{key: None})
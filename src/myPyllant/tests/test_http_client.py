@@ -0,0 +1,290 @@
+import asyncio
+import logging
+import time
+
+import aiohttp
+import pytest
+from aiohttp import ClientResponseError, web
+
+from ..api import MyPyllantAPI
+from ..http_client import (
+    FLEET_POLLING_POOL,
+    ConnectionPoolConfig,
+    DebugTracing,
+    RateLimiter,
+    RetryPolicy,
+    get_http_client,
+    parse_retry_after,
+)
+
+
+async def test_default_pool() -> None:
+    session = get_http_client()
+    assert session.connector.limit == 100
+    await session.close()
+
+
+async def test_pool_config() -> None:
+    session = get_http_client(
+        pool_config=ConnectionPoolConfig(
+            limit=5,
+            limit_per_host=3,
+            keepalive_timeout=42,
+            sock_read_timeout=7,
+        )
+    )
+    assert isinstance(session.connector, aiohttp.TCPConnector)
+    assert session.connector.limit == 5
+    assert session.connector.limit_per_host == 3
+    assert session.timeout.sock_read == 7
+    await session.close()
+
+
+async def test_api_pool_config() -> None:
+    api = MyPyllantAPI(
+        "test@example.com",
+        "test",
+        "vaillant",
+        "germany",
+        pool_config=FLEET_POLLING_POOL,
+    )
+    assert api.aiohttp_session.connector.limit == FLEET_POLLING_POOL.limit
+    assert api.aiohttp_session.timeout.total == FLEET_POLLING_POOL.total_timeout
+    await api.aiohttp_session.close()
+
+
+async def test_api_external_session(mypyllant_aioresponses) -> None:
+    external_session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=42))
+    with mypyllant_aioresponses():
+        async with MyPyllantAPI(
+            "test@example.com",
+            "test",
+            "vaillant",
+            "germany",
+            session=external_session,
+        ) as api:
+            assert api.aiohttp_session is not external_session
+            assert api.aiohttp_session.connector is external_session.connector
+            assert api.aiohttp_session.timeout.total == 42
+            assert api.aiohttp_session.cookie_jar is not external_session.cookie_jar
+    assert api.aiohttp_session.closed
+    assert not external_session.closed
+    assert not external_session.connector.closed
+    await external_session.close()
+
+    with pytest.raises(ValueError):
+        MyPyllantAPI(
+            "test@example.com",
+            "test",
+            "vaillant",
+            "germany",
+            session=external_session,
+        )
+
+
+async def test_api_external_connector() -> None:
+    connector = aiohttp.TCPConnector(limit=5)
+    api = MyPyllantAPI(
+        "test@example.com",
+        "test",
+        "vaillant",
+        "germany",
+        connector=connector,
+        pool_config=FLEET_POLLING_POOL,
+    )
+    assert api.aiohttp_session.connector is connector
+    assert api.aiohttp_session.timeout.total == FLEET_POLLING_POOL.total_timeout
+    await api.aiohttp_session.close()
+    assert not connector.closed
+    await connector.close()
+
+
+async def test_connections_released(aiohttp_server, mocked_api: MyPyllantAPI) -> None:
+    async def handler(request: web.Request) -> web.Response:
+        # Large enough that the body isn't fully buffered before it's read
+        return web.json_response({"method": request.method, "data": "x" * 2**18})
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    server = await aiohttp_server(app)
+    url = str(server.make_url("/systems/1"))
+
+    connections_created = 0
+
+    async def on_connection_create_end(session, context, params) -> None:
+        nonlocal connections_created
+        connections_created += 1
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    await mocked_api.aiohttp_session.close()
+    mocked_api.aiohttp_session = get_http_client(
+        pool_config=ConnectionPoolConfig(limit=10),
+        trace_configs=[trace_config],
+        rate_limiter=None,
+    )
+
+    async def send_requests() -> None:
+        for _ in range(200):
+            await asyncio.gather(
+                *(mocked_api._request("PATCH", url, json={}) for _ in range(5)),
+                # Distinct URLs, so concurrent GETs aren't coalesced
+                *(
+                    mocked_api._request("GET", f"{url}?n={n}", response_type="json")
+                    for n in range(5)
+                ),
+            )
+
+    # Leaked connections would exhaust the pool and block forever
+    await asyncio.wait_for(send_requests(), timeout=60)
+
+    assert mocked_api.aiohttp_session.request_count == 2000
+    # Every connection went back to the pool and was reused
+    assert connections_created <= 10
+    await mocked_api.aiohttp_session.close()
+
+
+async def test_rate_limiter_burst() -> None:
+    rate_limiter = RateLimiter(rate=50, burst=2)
+    started = time.monotonic()
+    await asyncio.gather(*(rate_limiter.acquire() for _ in range(6)))
+    # Two requests pass immediately, the remaining four wait for 1/50s each
+    assert time.monotonic() - started >= 0.07
+    assert rate_limiter.queue_depth == 0
+    assert rate_limiter.wait_count >= 4
+
+
+async def test_rate_limiter_throttle_and_recover() -> None:
+    rate_limiter = RateLimiter(rate=10, recovery_factor=2)
+    rate_limiter.update(429, {"Retry-After": "0.05"})
+    assert rate_limiter.rate == 5
+    assert rate_limiter.throttled_count == 1
+    started = time.monotonic()
+    await rate_limiter.acquire()
+    assert time.monotonic() - started >= 0.05
+
+    rate_limiter.update(503)
+    assert rate_limiter.rate == 2.5
+    rate_limiter.update(200)
+    assert rate_limiter.rate == 5
+    rate_limiter.update(200)
+    rate_limiter.update(200)
+    assert rate_limiter.rate == 10
+
+
+async def test_rate_limiter_parent_fairness() -> None:
+    parent = RateLimiter(rate=200, burst=1)
+    busy = RateLimiter(rate=1000, burst=100, parent=parent)
+    quiet = RateLimiter(rate=1000, burst=100, parent=parent)
+    order = []
+
+    async def acquire(rate_limiter: RateLimiter, name: str):
+        await rate_limiter.acquire()
+        order.append(name)
+
+    await asyncio.gather(
+        *[acquire(busy, "busy") for _ in range(10)],
+        *[acquire(quiet, "quiet") for _ in range(2)],
+    )
+    # The quiet limiter takes turns with the busy one instead of waiting for all its requests
+    assert order.count("quiet") == 2
+    assert len(order) - order[::-1].index("quiet") <= 5
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [(None, None), ("3", 3.0), ("-1", 0.0), ("invalid", None)],
+)
+def test_parse_retry_after(value, expected) -> None:
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date() -> None:
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+async def test_session_throttled(aiohttp_server) -> None:
+    async def handler(request: web.Request) -> web.Response:
+        return web.Response(status=429, headers={"Retry-After": "1"})
+
+    app = web.Application()
+    app.router.add_route("GET", "/", handler)
+    server = await aiohttp_server(app)
+
+    rate_limiter = RateLimiter(rate=4)
+    session = get_http_client(rate_limiter=rate_limiter)
+    with pytest.raises(ClientResponseError):
+        async with session.get(server.make_url("/")):
+            pass
+    assert rate_limiter.throttled_count == 1
+    assert rate_limiter.rate == 2
+    await session.close()
+
+
+def test_retry_policy_delay() -> None:
+    policy = RetryPolicy(backoff=1, max_backoff=5)
+    assert 0 <= policy.get_delay(1) <= 1
+    assert 0 <= policy.get_delay(10) <= 5
+    throttled = ClientResponseError(
+        None,  # type: ignore
+        (),
+        status=429,
+        headers={"Retry-After": "3"},  # type: ignore
+    )
+    assert policy.should_retry("GET", 1, throttled)
+    assert not policy.should_retry("GET", 3, throttled)
+    assert not policy.should_retry("POST", 1, throttled)
+    assert 3 <= policy.get_delay(1, throttled) <= 5
+
+
+@pytest.mark.parametrize(
+    "debug_tracing, logged_body",
+    [
+        (DebugTracing(max_body_length=20), '{"data": "xxxxxxxxxx...'),
+        (DebugTracing(max_body_length=None), '{"data": "' + "x" * 10000 + '"}'),
+        (DebugTracing(timing_only=True), None),
+    ],
+)
+async def test_debug_tracing(
+    aiohttp_server, caplog, debug_tracing, logged_body
+) -> None:
+    async def handler(request: web.Request) -> web.Response:
+        return web.json_response({"data": "x" * 10000})
+
+    app = web.Application()
+    app.router.add_route("POST", "/", handler)
+    server = await aiohttp_server(app)
+
+    session = get_http_client(debug_tracing=debug_tracing, rate_limiter=None)
+    with caplog.at_level(logging.DEBUG, logger="myPyllant.http_client"):
+        async with session.post(server.make_url("/"), json={"a": 1}) as response:
+            assert len((await response.json())["data"]) == 10000
+    await session.close()
+
+    messages = [r.getMessage() for r in caplog.records]
+    assert any(m.startswith("Got 200 response for POST") for m in messages)
+    bodies = "".join(
+        m.split(": ", 1)[1] for m in messages if m.startswith("Got response body")
+    )
+    if logged_body is None:
+        assert bodies == ""
+        assert not any(m.startswith("Sending POST") for m in messages)
+    else:
+        assert bodies == logged_body
+        assert any(m.endswith('with {"a": 1}') for m in messages)
+
+
+async def test_debug_tracing_sampling(aiohttp_server, caplog) -> None:
+    async def handler(request: web.Request) -> web.Response:
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_route("GET", "/", handler)
+    server = await aiohttp_server(app)
+
+    session = get_http_client(debug_tracing=DebugTracing(sample_rate=0))
+    with caplog.at_level(logging.DEBUG, logger="myPyllant.http_client"):
+        async with session.get(server.make_url("/")) as response:
+            await response.read()
+    await session.close()
+    assert not caplog.records
@@ -0,0 +1,149 @@
+import math
+import os
+import subprocess
+import sys
+
+import pytest
+from aiohttp import ClientResponseError, web
+
+from ..api import MyPyllantAPI
+from ..cache import MemoryResponseCache
+from ..http_client import get_http_client
+from ..metrics import (
+    PROMETHEUS_CONTENT_TYPE,
+    SessionMetrics,
+    create_metrics_app,
+    get_account_id,
+    get_endpoint_template,
+    render_prometheus,
+)
+from .generate_test_data import DATA_DIR
+from .utils import load_test_data
+
+API_BASE = (
+    "https://api.vaillant-group.com/service-connected-control/end-user-app-api/v1"
+)
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        (
+            f"{API_BASE}/emf/v2/f47ac10b-58cc-4372-a567-0e02b2c3d479/currentSystem",
+            "/emf/v2/{id}/currentSystem",
+        ),
+        (f"{API_BASE}/hem/21222500100211330001/mpc", "/hem/{id}/mpc"),
+        (
+            f"{API_BASE}/systems/abcd1234/vrc700/zones/0/name",
+            "/systems/{id}/vrc700/zones/{id}/name",
+        ),
+        (f"{API_BASE}/homes?limit=1", "/homes"),
+        (
+            "https://identity.vaillant-group.com/auth/realms/vaillant-germany-b2c/protocol/openid-connect/token",
+            "/auth/realms/vaillant-germany-b2c/protocol/openid-connect/token",
+        ),
+    ],
+)
+def test_get_endpoint_template(url, expected) -> None:
+    assert get_endpoint_template(url) == expected
+
+
+def test_latency_histogram() -> None:
+    metrics = SessionMetrics()
+    for seconds in (0.01, 0.2, 0.3, 20):
+        metrics.record_response("get", f"{API_BASE}/homes", 200, seconds)
+    latency = metrics.stats()["GET /homes"]["latency"]
+    assert latency["buckets"][0.05] == 1
+    assert latency["buckets"][0.5] == 3
+    assert latency["buckets"][math.inf] == 4
+    assert latency["max"] == 20
+    assert latency["mean"] == pytest.approx(20.51 / 4)
+
+
+async def test_session_metrics(aiohttp_server) -> None:
+    async def handler(request: web.Request) -> web.Response:
+        if request.match_info["system_id"] == "missing01":
+            return web.Response(status=404)
+        return web.json_response({"data": "x" * 1000})
+
+    app = web.Application()
+    app.router.add_get("/v1/systems/{system_id}/currentSystem", handler)
+    server = await aiohttp_server(app)
+
+    session = get_http_client(rate_limiter=None)
+    for system_id in ("system01", "system02"):
+        async with session.get(
+            server.make_url(f"/v1/systems/{system_id}/currentSystem")
+        ) as response:
+            await response.read()
+    with pytest.raises(ClientResponseError):
+        async with session.get(server.make_url("/v1/systems/missing01/currentSystem")):
+            pass
+
+    stats = session.stats()["GET /systems/{id}/currentSystem"]
+    assert stats["count"] == 3
+    assert stats["statuses"] == {200: 2, 404: 1}
+    assert stats["bytes_received"] >= 2000
+    assert stats["latency"]["buckets"][math.inf] == 3
+    await session.close()
+
+    session = get_http_client(metrics=None)
+    assert session.stats() == {}
+    await session.close()
+
+
+async def test_render_prometheus(mypyllant_aioresponses, mocked_api: MyPyllantAPI):
+    mocked_api.response_cache = MemoryResponseCache()
+    test_data = load_test_data(DATA_DIR / "vrc700")
+    with mypyllant_aioresponses(test_data):
+        for _ in range(2):
+            async for _ in mocked_api.get_systems(include_mpc=True):
+                pass
+    text = render_prometheus([mocked_api])
+    lines = text.splitlines()
+    account = f'account="{get_account_id(mocked_api)}"'
+    assert "test@example.com" not in text
+    assert "# TYPE mypyllant_request_duration_seconds histogram" in lines
+    assert (
+        "mypyllant_requests_total{"
+        + account
+        + ',method="GET",endpoint="/hem/{id}/mpc",status="200"} 2'
+    ) in lines
+    assert (
+        "mypyllant_request_duration_seconds_count{"
+        + account
+        + ',method="GET",endpoint="/hem/{id}/mpc"} 2'
+    ) in lines
+    assert any(
+        line.startswith("mypyllant_request_duration_seconds_bucket{")
+        and 'le="+Inf"' in line
+        for line in lines
+    )
+    assert f"mypyllant_response_cache_hits_total{{{account}}} 1" in lines
+    assert f"mypyllant_token_refreshes_total{{{account}}} 0" in lines
+    assert f"mypyllant_skipped_writes_total{{{account}}} 0" in lines
+    assert any(line.startswith("mypyllant_rate_limiter_rate{") for line in lines)
+    # Every family is rendered once, with all its samples together
+    assert text.count("# TYPE mypyllant_requests_total ") == 1
+    await mocked_api.aiohttp_session.close()
+
+
+async def test_metrics_app(aiohttp_client, mocked_api: MyPyllantAPI):
+    client = await aiohttp_client(
+        create_metrics_app(
+            lambda: [mocked_api], account_label=lambda api: 'quoted"user'
+        )
+    )
+    response = await client.get("/metrics")
+    assert response.status == 200
+    assert response.headers["Content-Type"] == PROMETHEUS_CONTENT_TYPE
+    assert 'mypyllant_session_requests_total{account="quoted\\"user"} 0' in (
+        await response.text()
+    )
+    await mocked_api.aiohttp_session.close()
+
+
+def test_web_imported_lazily():
+    code = "import sys, myPyllant.api; assert 'aiohttp.web' not in sys.modules"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    subprocess.run([sys.executable, "-c", code], check=True, env=env)
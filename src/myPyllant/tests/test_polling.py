@@ -0,0 +1,160 @@
+import asyncio
+import copy
+
+from ..api import MyPyllantAPI
+from ..enums import CircuitState, ZoneOperatingModeVRC700
+from ..polling import PollingCoordinator, PollingIntervals
+from .generate_test_data import DATA_DIR
+from .utils import load_test_data
+
+
+async def test_get_interval(mypyllant_aioresponses, mocked_api: MyPyllantAPI):
+    test_data = load_test_data(DATA_DIR / "vrc700")
+    with mypyllant_aioresponses(test_data):
+        system = await anext(mocked_api.get_systems())
+    coordinator = PollingCoordinator(mocked_api, jitter=0)
+    circuit = system.circuits[0]
+
+    circuit.circuit_state = CircuitState.HEATING
+    assert coordinator.is_active(system)
+    assert coordinator.get_interval(system, "state") == 30
+    assert coordinator.get_interval(system, "mpc") == 15
+    assert coordinator.get_interval(system, "rts") == 3600
+
+    circuit.circuit_state = CircuitState.STANDBY
+    assert coordinator.is_active(system) is False
+    assert coordinator.get_interval(system, "state") == 120
+    assert coordinator.get_interval(system, "rts") == 3600
+
+    circuit.circuit_state = None
+    assert coordinator.is_active(system) is None
+    assert coordinator.get_interval(system, "state") == 60
+
+    coordinator.jitter = 0.1
+    intervals = [coordinator.get_interval(system, "state") for _ in range(100)]
+    assert all(54 <= i <= 66 for i in intervals)
+    assert len(set(intervals)) > 1
+    await mocked_api.aiohttp_session.close()
+
+
+async def test_polling_coordinator(mypyllant_aioresponses, mocked_api: MyPyllantAPI):
+    test_data = load_test_data(DATA_DIR / "vrc700")
+    intervals = PollingIntervals(
+        mpc=0.01,
+        state=0.02,
+        rts=None,
+        diagnostic_trouble_codes=None,
+        eebus=None,
+        ambisense_capability=None,
+    )
+    updates: list[str] = []
+    with mypyllant_aioresponses(test_data):
+        async with PollingCoordinator(mocked_api, intervals) as coordinator:
+            assert len(coordinator.systems) == 1
+            system = next(iter(coordinator.systems.values()))
+            assert system.mpc is not None
+            remove_listener = coordinator.add_listener(
+                lambda s, data_class: updates.append(data_class)
+            )
+            await asyncio.sleep(0.2)
+            remove_listener()
+            assert {"mpc", "state"} == set(updates)
+            assert coordinator.poll_count == len(updates)
+            assert coordinator.error_count == 0
+            # State polls keep the parsed device data
+            device_data = [d for device in system.devices for d in device.data]
+            assert device_data
+            assert all(d.data_from is not None for d in device_data)
+        assert not coordinator._tasks
+        poll_count = coordinator.poll_count
+        await asyncio.sleep(0.05)
+        assert coordinator.poll_count == poll_count
+    await mocked_api.aiohttp_session.close()
+
+
+async def test_polling_coordinator_configuration(
+    mypyllant_aioresponses, mocked_api: MyPyllantAPI
+):
+    test_data = load_test_data(DATA_DIR / "vrc700")
+    system_id = test_data["homes"][0]["systemId"]
+    intervals = PollingIntervals(
+        mpc=None,
+        state=0.01,
+        rts=None,
+        diagnostic_trouble_codes=None,
+        eebus=None,
+        ambisense_capability=None,
+        configuration=0.05,
+    )
+    updates: list[str] = []
+    # Polls faster than the rate limit allows
+    mocked_api.aiohttp_session.rate_limiter = None
+    with mypyllant_aioresponses(test_data):
+        async with PollingCoordinator(mocked_api, intervals) as coordinator:
+            system = coordinator.systems[system_id]
+            assert (
+                system.zones[0].heating.operation_mode_heating
+                == ZoneOperatingModeVRC700.AUTO
+            )
+            coordinator.add_listener(lambda s, data_class: updates.append(data_class))
+            # Changed in the app
+            system_json = copy.deepcopy(test_data[system_id]["system"])
+            system_json["configuration"]["zones"][0]["heating"][
+                "operationModeHeating"
+            ] = "OFF"
+            test_data[system_id]["system"] = system_json
+            await asyncio.sleep(0.1)
+            assert "configuration" in updates
+            assert coordinator.systems[system_id] is not system
+            assert (
+                coordinator.systems[system_id].zones[0].heating.operation_mode_heating
+                == ZoneOperatingModeVRC700.OFF
+            )
+            # Polls continue with the new system
+            updates.clear()
+            await asyncio.sleep(0.03)
+            assert "state" in updates
+            assert coordinator.error_count == 0
+            assert len(coordinator.systems) == 1
+    await mocked_api.aiohttp_session.close()
+
+
+async def test_polling_coordinator_errors(
+    mypyllant_aioresponses, mocker, mocked_api: MyPyllantAPI
+):
+    test_data = load_test_data(DATA_DIR / "vrc700")
+    intervals = PollingIntervals(
+        mpc=0.01,
+        state=None,
+        rts=None,
+        diagnostic_trouble_codes=None,
+        eebus=None,
+        ambisense_capability=None,
+    )
+    with mypyllant_aioresponses(test_data):
+        async with PollingCoordinator(mocked_api, intervals) as coordinator:
+            mocker.patch.object(mocked_api, "get_mpc", side_effect=ValueError)
+            await asyncio.sleep(0.1)
+            # Polling continues after errors
+            assert coordinator.error_count > 1
+            assert coordinator.poll_count == 0
+    await mocked_api.aiohttp_session.close()
+
+
+async def test_polling_coordinator_restart(
+    mypyllant_aioresponses, mocked_api: MyPyllantAPI
+):
+    test_data = load_test_data(DATA_DIR / "vrc700")
+    intervals = PollingIntervals(mpc=60, state=60)
+    with mypyllant_aioresponses(test_data):
+        # Flags of get_systems() can be overridden
+        coordinator = PollingCoordinator(mocked_api, intervals, include_mpc=False)
+        await coordinator.start()
+        system = next(iter(coordinator.systems.values()))
+        assert system.mpc is None
+        tasks = coordinator._tasks
+        await coordinator.start()
+        assert all(task.done() for task in tasks)
+        assert len(coordinator._tasks) == len(tasks)
+        await coordinator.stop()
+    await mocked_api.aiohttp_session.close()
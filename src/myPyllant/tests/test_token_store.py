@@ -0,0 +1,82 @@
+import stat
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from ..api import MyPyllantAPI
+from ..token_store import FileTokenStore
+
+
+def auth_calls(aio, path: str) -> int:
+    return sum(
+        len(calls) for (_, url), calls in aio.requests.items() if path in str(url)
+    )
+
+
+def test_file_token_store(tmp_path) -> None:
+    path = tmp_path / "sessions.json"
+    store = FileTokenStore(path)
+    assert store.load("test@example.com") is None
+    store.save("test@example.com", {"oauth_session": {"access_token": "a"}})
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    assert FileTokenStore(path).load("test@example.com") == {
+        "oauth_session": {"access_token": "a"}
+    }
+    store.clear("test@example.com")
+    assert store.load("test@example.com") is None
+
+    path.write_text("not json")
+    assert store.load("test@example.com") is None
+
+
+def test_encrypted_file_token_store(tmp_path) -> None:
+    fernet = pytest.importorskip("cryptography.fernet")
+    path = tmp_path / "sessions.json"
+    key = fernet.Fernet.generate_key()
+    FileTokenStore(path, encryption_key=key).save("user", {"oauth_session": {}})
+    assert b"oauth_session" not in path.read_bytes()
+    assert FileTokenStore(path, encryption_key=key).load("user") == {
+        "oauth_session": {}
+    }
+    other_key = fernet.Fernet.generate_key()
+    assert FileTokenStore(path, encryption_key=other_key).load("user") is None
+
+
+async def test_export_import_session(mocked_api: MyPyllantAPI) -> None:
+    session = mocked_api.export_session()
+    api = MyPyllantAPI("test@example.com", "test", "vaillant", "germany")
+    api.import_session(session)
+    assert api.oauth_session == mocked_api.oauth_session
+    assert api.oauth_session_expires == mocked_api.oauth_session_expires
+    await api.aiohttp_session.close()
+    await mocked_api.aiohttp_session.close()
+
+
+async def test_resume_session(mypyllant_aioresponses, tmp_path) -> None:
+    store = FileTokenStore(tmp_path / "sessions.json")
+    args = ("test@example.com", "test", "vaillant", "germany")
+    with mypyllant_aioresponses() as aio:
+        async with MyPyllantAPI(*args, token_store=store):
+            pass
+        assert auth_calls(aio, "openid-connect/auth") == 1
+        assert auth_calls(aio, "openid-connect/token") == 1
+
+        # A valid stored token is used as is
+        async with MyPyllantAPI(*args, token_store=store) as api:
+            assert api.access_token == "access_token"
+        assert auth_calls(aio, "openid-connect/auth") == 1
+        assert auth_calls(aio, "openid-connect/token") == 1
+
+        # An expired token gets refreshed instead of logging in again
+        session = store.load("test@example.com")
+        session["oauth_session_expires"] = (
+            datetime.now(timezone.utc) - timedelta(minutes=1)
+        ).isoformat()
+        store.save("test@example.com", session)
+        async with MyPyllantAPI(*args, token_store=store) as api:
+            assert api.token_refresh_count == 1
+        assert auth_calls(aio, "openid-connect/auth") == 1
+        assert auth_calls(aio, "openid-connect/token") == 2
+        assert store.load("test@example.com")["oauth_session_expires"] > (
+            datetime.now(timezone.utc).isoformat()
+        )
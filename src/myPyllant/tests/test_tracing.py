@@ -0,0 +1,89 @@
+import contextvars
+from contextlib import contextmanager
+
+import pytest
+from aiohttp import ClientResponseError
+from aioresponses import aioresponses
+
+from ..api import MyPyllantAPI
+from ..enums import ZoneOperatingModeVRC700
+from .generate_test_data import DATA_DIR
+from .utils import load_test_data
+
+
+class RecordedSpan:
+    def __init__(self, name, attributes, parent):
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+
+class RecordingTracer:
+    def __init__(self):
+        self.spans: list[RecordedSpan] = []
+        self.current: contextvars.ContextVar = contextvars.ContextVar(
+            "span", default=None
+        )
+
+    @contextmanager
+    def start_as_current_span(self, name, attributes=None, **kwargs):
+        span = RecordedSpan(name, dict(attributes or {}), self.current.get())
+        self.spans.append(span)
+        token = self.current.set(span)
+        try:
+            yield span
+        finally:
+            self.current.reset(token)
+
+
+async def test_trace_get_systems(mypyllant_aioresponses, mocked_api: MyPyllantAPI):
+    tracer = RecordingTracer()
+    mocked_api.tracer = tracer
+    test_data = load_test_data(DATA_DIR / "vrc700")
+    with mypyllant_aioresponses(test_data):
+        system = await anext(mocked_api.get_systems(include_mpc=True))
+
+        system_spans = [s for s in tracer.spans if s.name == "mypyllant.get_system"]
+        assert len(system_spans) == 1
+        assert system_spans[0].attributes == {
+            "mypyllant.system_id": system.id,
+            "mypyllant.control_identifier": str(system.control_identifier),
+        }
+        children = [s for s in tracer.spans if s.parent is system_spans[0]]
+        assert {s.attributes["url.template"] for s in children} >= {
+            "/emf/v2/{id}/currentSystem",
+            "/hem/{id}/mpc",
+        }
+        assert all(s.name == "HTTP GET" for s in children)
+        assert all(s.attributes["http.response.status_code"] == 200 for s in children)
+        assert [
+            s.attributes["mypyllant.endpoint"]
+            for s in children
+            if "mpc" in s.attributes["url.template"]
+        ] == ["mpc"]
+
+        tracer.spans.clear()
+        await mocked_api.set_zone_operating_mode(
+            system.zones[0], ZoneOperatingModeVRC700.AUTO
+        )
+        set_span, http_span = tracer.spans
+        assert set_span.name == "mypyllant.set_zone_operating_mode"
+        assert set_span.attributes["mypyllant.system_id"] == system.id
+        assert http_span.parent is set_span
+        assert http_span.name == "HTTP PATCH"
+    await mocked_api.aiohttp_session.close()
+
+
+async def test_trace_error_status(mocked_api: MyPyllantAPI):
+    tracer = RecordingTracer()
+    mocked_api.tracer = tracer
+    with aioresponses() as aio:
+        url = "https://api.vaillant-group.com/v1/systems/abcd1234/missing"
+        aio.get(url, status=404, reason="Not Found")
+        with pytest.raises(ClientResponseError):
+            await mocked_api._request("GET", url)
+    assert tracer.spans[-1].attributes["http.response.status_code"] == 404
+    await mocked_api.aiohttp_session.close()
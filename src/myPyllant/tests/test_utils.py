@@ -1,5 +1,7 @@
+import asyncio
+import warnings
 from datetime import datetime, timezone
-from myPyllant.utils import datetime_parse
+from myPyllant.utils import datetime_parse, gather_limited
 from zoneinfo import ZoneInfo
 
 """
@@ -42,3 +44,21 @@ async def test_datetime_parse_zulu_datetime():
     parsed_date = datetime_parse(date_string, london_timezone)
     assert isinstance(parsed_date, datetime)
     assert parsed_date == datetime(2025, 4, 10, 18, 0, 3, tzinfo=london_timezone)
+
+
+async def test_gather_limited_cancelled():
+    started: list[int] = []
+
+    async def work(i: int):
+        started.append(i)
+        await asyncio.sleep(1)
+
+    awaitables = [work(i) for i in range(3)]
+    task = asyncio.create_task(gather_limited(awaitables, limit=1))
+    await asyncio.sleep(0.01)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    assert started == [0]
+    assert all(a.cr_frame is None for a in awaitables)
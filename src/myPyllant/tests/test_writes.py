@@ -0,0 +1,206 @@
+import asyncio
+import inspect
+from types import SimpleNamespace
+
+import pytest
+
+from ..api import MyPyllantAPI
+from ..enums import ZoneOperatingModeVRC700
+from ..writes import WRITE_METHODS, WriteDebouncer, WriteOperation
+from .generate_test_data import DATA_DIR
+from .utils import load_test_data
+
+
+async def test_apply_writes(mypyllant_aioresponses, mocked_api: MyPyllantAPI):
+    test_data = load_test_data(DATA_DIR / "vrc700")
+    with mypyllant_aioresponses(test_data) as aio:
+        system = await anext(mocked_api.get_systems())
+        zone = system.zones[0]
+        results = await mocked_api.apply_writes(
+            [
+                WriteOperation(
+                    "set_zone_operating_mode", zone, (ZoneOperatingModeVRC700.OFF,)
+                ),
+                WriteOperation("set_zone_operating_mode", zone, ("INVALID",)),
+                WriteOperation("set_holiday", system, kwargs={"setpoint": 10.0}),
+            ]
+        )
+        assert [r.operation.method for r in results] == [
+            "set_zone_operating_mode",
+            "set_zone_operating_mode",
+            "set_holiday",
+        ]
+        assert results[0].ok
+        assert results[0].result is zone
+        assert zone.heating.operation_mode_heating == ZoneOperatingModeVRC700.OFF
+        assert not results[1].ok
+        assert isinstance(results[1].error, ValueError)
+        assert results[2].ok
+        patch_requests = [
+            request
+            for (method, _), requests in aio.requests.items()
+            for request in requests
+            if method in ("PATCH", "POST")
+        ]
+        assert len(patch_requests) == 2
+    await mocked_api.aiohttp_session.close()
+
+
+async def test_apply_writes_order_per_target(mocker, mocked_api: MyPyllantAPI):
+    events: list[tuple] = []
+    running = 0
+    max_running = 0
+
+    async def set_manual_mode_setpoint(target, setpoint):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        events.append((target.index, setpoint))
+        await asyncio.sleep(0.01 * (3 - target.index))
+        running -= 1
+        return setpoint
+
+    mocker.patch.object(
+        mocked_api, "set_manual_mode_setpoint", side_effect=set_manual_mode_setpoint
+    )
+    zones = [SimpleNamespace(system_id="system", index=i) for i in range(3)]
+    operations = [
+        WriteOperation("set_manual_mode_setpoint", zone, (setpoint,))
+        for setpoint in (20.0, 21.0)
+        for zone in zones
+    ]
+    results = await mocked_api.apply_writes(operations)
+    assert [r.result for r in results] == [20.0, 20.0, 20.0, 21.0, 21.0, 21.0]
+    assert max_running == 3
+    for zone in zones:
+        assert [s for i, s in events if i == zone.index] == [20.0, 21.0]
+
+    events.clear()
+    max_running = 0
+    await mocked_api.apply_writes(operations, max_concurrent_targets=1)
+    assert max_running == 1
+    await mocked_api.aiohttp_session.close()
+
+
+@pytest.mark.parametrize(
+    "method",
+    [
+        "unknown_method",
+        "_request",
+        "login",
+        "get_systems",
+        "refresh_token",
+        "set_",
+        "set_session_expires",
+    ],
+)
+async def test_apply_writes_unknown_method(mocked_api: MyPyllantAPI, method):
+    with pytest.raises(ValueError):
+        await mocked_api.apply_writes([WriteOperation(method, object())])
+    await mocked_api.aiohttp_session.close()
+
+
+async def test_write_debouncer(mocker, mocked_api: MyPyllantAPI):
+    set_manual_mode_setpoint = mocker.patch.object(
+        mocked_api, "set_manual_mode_setpoint", side_effect=lambda *args: args
+    )
+    zones = [SimpleNamespace(system_id="system", index=i) for i in range(2)]
+    debouncer = WriteDebouncer(mocked_api, delay=0.01)
+    results = await asyncio.gather(
+        *(
+            debouncer.write("set_manual_mode_setpoint", zones[0], setpoint)
+            for setpoint in (20.0, 20.5, 21.0)
+        ),
+        debouncer.write("set_manual_mode_setpoint", zones[1], 18.0),
+        debouncer.write("set_manual_mode_setpoint", zones[0], 16.0, "cooling"),
+    )
+    assert results[:3] == [(zones[0], 21.0)] * 3
+    assert results[3] == (zones[1], 18.0)
+    assert results[4] == (zones[0], 16.0, "cooling")
+    assert set_manual_mode_setpoint.call_count == 3
+    assert debouncer.debounced_count == 2
+
+    # The window starts again after a write was sent
+    await debouncer.write("set_manual_mode_setpoint", zones[0], 22.0)
+    set_manual_mode_setpoint.assert_called_with(zones[0], 22.0)
+    await mocked_api.aiohttp_session.close()
+
+
+async def test_write_debouncer_program_type(mocker, mocked_api: MyPyllantAPI):
+    set_time_program_temperature = mocker.patch.object(
+        mocked_api, "set_time_program_temperature", side_effect=lambda *args: args
+    )
+    zone = SimpleNamespace(system_id="system", index=0)
+    debouncer = WriteDebouncer(mocked_api, delay=0.01)
+    results = await asyncio.gather(
+        debouncer.write("set_time_program_temperature", zone, "heating", 20.0),
+        debouncer.write("set_time_program_temperature", zone, "heating", 20.5),
+        debouncer.write("set_time_program_temperature", zone, "heating", 21.0),
+        debouncer.write("set_time_program_temperature", zone, "cooling", 21.0),
+    )
+    assert results[:3] == [(zone, "heating", 21.0)] * 3
+    assert results[3] == (zone, "cooling", 21.0)
+    assert set_time_program_temperature.call_count == 2
+    assert debouncer.debounced_count == 2
+    await mocked_api.aiohttp_session.close()
+
+
+async def test_write_debouncer_keyword_arguments(mocker, mocked_api: MyPyllantAPI):
+    set_manual_mode_setpoint = mocker.patch.object(
+        mocked_api, "set_manual_mode_setpoint"
+    )
+    zone = SimpleNamespace(system_id="system", index=0)
+    debouncer = WriteDebouncer(mocked_api, delay=0.01)
+    await asyncio.gather(
+        debouncer.write("set_manual_mode_setpoint", zone, 20.0),
+        debouncer.write("set_manual_mode_setpoint", zone, temperature=20.5),
+        debouncer.write("set_manual_mode_setpoint", zone, 21.0, "heating"),
+        debouncer.write(
+            "set_manual_mode_setpoint", zone, temperature=21.0, setpoint_type="heating"
+        ),
+    )
+    set_manual_mode_setpoint.assert_called_once_with(
+        zone, temperature=21.0, setpoint_type="heating"
+    )
+    assert debouncer.debounced_count == 3
+    await mocked_api.aiohttp_session.close()
+
+
+async def test_write_debouncer_error(mocker, mocked_api: MyPyllantAPI):
+    mocker.patch.object(
+        mocked_api,
+        "set_domestic_hot_water_temperature",
+        side_effect=ValueError("Invalid temperature"),
+    )
+    dhw = SimpleNamespace(system_id="system", index=255)
+    debouncer = WriteDebouncer(mocked_api, delay=0.01)
+    results = await asyncio.gather(
+        debouncer.write("set_domestic_hot_water_temperature", dhw, 45),
+        debouncer.write("set_domestic_hot_water_temperature", dhw, 90),
+        return_exceptions=True,
+    )
+    assert all(isinstance(r, ValueError) for r in results)
+    with pytest.raises(ValueError):
+        await debouncer.write("unknown_method", dhw, 45)
+    await mocked_api.aiohttp_session.close()
+
+
+async def test_write_debouncer_flush(mocker, mocked_api: MyPyllantAPI):
+    set_domestic_hot_water_temperature = mocker.patch.object(
+        mocked_api, "set_domestic_hot_water_temperature"
+    )
+    dhw = SimpleNamespace(system_id="system", index=255)
+    async with WriteDebouncer(mocked_api, delay=60) as debouncer:
+        task = asyncio.create_task(
+            debouncer.write("set_domestic_hot_water_temperature", dhw, 50)
+        )
+        await asyncio.sleep(0)
+        set_domestic_hot_water_temperature.assert_not_called()
+    set_domestic_hot_water_temperature.assert_called_once_with(dhw, 50)
+    await task
+    await mocked_api.aiohttp_session.close()
+
+
+def test_write_methods():
+    for name in WRITE_METHODS:
+        assert inspect.iscoroutinefunction(getattr(MyPyllantAPI, name)), name
@@ -143,7 +143,7 @@ def _mypyllant_aioresponses():
             )
             self.patch(
                 re.compile(
-                    r".*zones?/.*/(quick-veto|manual-mode-setpoint|heating-operation-mode|operation-mode|setpoint-cooling)$"
+                    r".*zones?/.*/(quick-veto|manual-mode-setpoint|heating-operation-mode|operation-mode|setpoint-cooling|time-windows)$"
                 ),
                 status=200,
                 payload={},
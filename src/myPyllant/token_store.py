@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any
+
+from myPyllant.cache import get_default_cache_dir
+
+logger = logging.getLogger(__name__)
+
+
+class TokenStore(ABC):
+    """
+    Persists OAuth sessions by username, so a new process can refresh or reuse a token instead of logging in
+
+    Subclass this and implement `load()`, `save()` and `clear()` to keep sessions somewhere else,
+    i.e. in a keyring.
+    """
+
+    @abstractmethod
+    def load(self, username: str) -> dict[str, Any] | None:
+        """
+        Returns the session saved by `MyPyllantAPI.export_session()`, or None
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def save(self, username: str, session: dict[str, Any]):
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self, username: str):
+        raise NotImplementedError
+
+
+class FileTokenStore(TokenStore):
+    """
+    Stores sessions in a file only readable by the current user, optionally encrypted
+
+    Encryption requires the `cryptography` package, install it with `pip install myPyllant[encryption]`.
+
+    Parameters:
+        path: Path of the file, defaults to `sessions.json` in `get_default_cache_dir()`
+        encryption_key: Fernet key to encrypt the file with, i.e. from `cryptography.fernet.Fernet.generate_key()`
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        encryption_key: str | bytes | None = None,
+    ):
+        self.path = Path(path) if path else get_default_cache_dir() / "sessions.json"
+        self.fernet = None
+        if encryption_key:
+            try:
+                from cryptography.fernet import Fernet  # type: ignore[import-not-found]
+            except ImportError as e:
+                raise ImportError(
+                    "Encrypting the token store requires cryptography, "
+                    "install it with pip install myPyllant[encryption]"
+                ) from e
+            self.fernet = Fernet(encryption_key)
+
+    def _read(self) -> dict[str, dict[str, Any]]:
+        try:
+            with open(self.path, "rb") as fh:
+                content = fh.read()
+            if self.fernet:
+                content = self.fernet.decrypt(content)
+            return json.loads(content)
+        except FileNotFoundError:
+            return {}
+        except Exception:
+            # Corrupt files, invalid keys and unencrypted files all mean we need to log in again
+            logger.warning("Couldn't read sessions from %s", self.path, exc_info=True)
+            return {}
+
+    def _write(self, sessions: dict[str, dict[str, Any]]):
+        content = json.dumps(sessions).encode()
+        if self.fernet:
+            content = self.fernet.encrypt(content)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(content)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            logger.warning("Couldn't write sessions to %s", self.path, exc_info=True)
+
+    def load(self, username: str) -> dict[str, Any] | None:
+        return self._read().get(username)
+
+    def save(self, username: str, session: dict[str, Any]):
+        sessions = self._read()
+        sessions[username] = session
+        self._write(sessions)
+
+    def clear(self, username: str):
+        sessions = self._read()
+        if sessions.pop(username, None) is not None:
+            self._write(sessions)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import functools
+from collections.abc import Callable, Coroutine, Iterator, Mapping
+from contextlib import AbstractContextManager, contextmanager
+from typing import Any, Concatenate, ParamSpec, Protocol, TypeVar
+
+from myPyllant.models import System
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class Tracer(Protocol):
+    """
+    Anything with an OpenTelemetry compatible `start_as_current_span()`, i.e. `opentelemetry.trace.get_tracer()`
+    """
+
+    def start_as_current_span(
+        self, name: str, *args: Any, **kwargs: Any
+    ) -> AbstractContextManager[Any]: ...
+
+
+@contextmanager
+def start_span(
+    tracer: Tracer | None, name: str, attributes: Mapping[str, Any] | None = None
+) -> Iterator[Any]:
+    """
+    Starts a span as a child of the current one, or does nothing and yields None without a tracer
+
+    Attributes that are None are left out.
+    """
+    if tracer is None:
+        yield None
+        return
+    with tracer.start_as_current_span(
+        name,
+        attributes={k: v for k, v in (attributes or {}).items() if v is not None},
+    ) as span:
+        yield span
+
+
+def set_span_attribute(span: Any, key: str, value: Any):
+    if span is not None and value is not None:
+        span.set_attribute(key, value)
+
+
+def get_span_attributes(target: Any) -> dict[str, Any]:
+    """
+    Returns the system ID and control identifier of a system, zone, circuit etc. as span attributes
+    """
+    system_id = target.id if isinstance(target, System) else None
+    system_id = getattr(target, "system_id", system_id)
+    if isinstance(target, str):
+        system_id = target
+    control_identifier = getattr(target, "control_identifier", None)
+    return {
+        "mypyllant.system_id": system_id,
+        "mypyllant.control_identifier": str(control_identifier)
+        if control_identifier
+        else None,
+    }
+
+
+def traced(
+    func: Callable[Concatenate[Any, P], Coroutine[Any, Any, T]],
+) -> Callable[Concatenate[Any, P], Coroutine[Any, Any, T]]:
+    """
+    Wraps an API method in a span, with attributes of its first argument (i.e. the zone)
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self, *args: P.args, **kwargs: P.kwargs) -> T:
+        attributes = get_span_attributes(args[0]) if args else {}
+        with start_span(self.tracer, f"mypyllant.{func.__name__}", attributes):
+            return await func(self, *args, **kwargs)
+
+    return wrapper
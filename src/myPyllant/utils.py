@@ -1,11 +1,15 @@
 import argparse
+import asyncio
 import base64
 import hashlib
+import inspect
 import random
 import re
 import string
 from datetime import datetime, tzinfo, timezone, timedelta
+from collections.abc import Awaitable, Iterable
 from enum import Enum
+from typing import Any
 
 from myPyllant.const import BRANDS, COUNTRIES, DEFAULT_BRAND, DEFAULT_HOLIDAY_DURATION
 
@@ -175,6 +179,34 @@ def get_default_holiday_dates(
     return start, end
 
 
+async def gather_limited(
+    awaitables: Iterable[Awaitable], limit: int, return_exceptions: bool = False
+) -> list[Any]:
+    """
+    Like asyncio.gather(), but with at most `limit` awaitables running at the same time
+    """
+    awaitables = list(awaitables)
+    semaphore = asyncio.Semaphore(max(limit, 1))
+
+    async def limited(awaitable: Awaitable):
+        async with semaphore:
+            return await awaitable
+
+    try:
+        return await asyncio.gather(
+            *(limited(a) for a in awaitables), return_exceptions=return_exceptions
+        )
+    except asyncio.CancelledError:
+        # Coroutines that were still waiting for their turn would warn that they were never awaited
+        for awaitable in awaitables:
+            if (
+                inspect.iscoroutine(awaitable)
+                and inspect.getcoroutinestate(awaitable) == inspect.CORO_CREATED
+            ):
+                awaitable.close()
+        raise
+
+
 def recursive_compare(d1, d2, level="root"):
     """
     See https://stackoverflow.com/a/53818532
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from myPyllant.const import (
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_WRITE_DEBOUNCE_DELAY,
+)
+from myPyllant.models import System
+from myPyllant.utils import gather_limited
+
+if TYPE_CHECKING:
+    from myPyllant.api import MyPyllantAPI
+
+logger = logging.getLogger(__name__)
+
+# Methods of MyPyllantAPI that change a zone, room, circuit etc.
+WRITE_METHODS = frozenset(
+    {
+        "boost_domestic_hot_water",
+        "cancel_cooling_for_days",
+        "cancel_holiday",
+        "cancel_hot_water_boost",
+        "cancel_quick_veto_ambisense_room",
+        "cancel_quick_veto_zone_temperature",
+        "cancel_ventilation_boost",
+        "quick_veto_ambisense_room",
+        "quick_veto_zone_duration",
+        "quick_veto_zone_temperature",
+        "set_ambisense_room_manual_mode_setpoint_temperature",
+        "set_ambisense_room_operation_mode",
+        "set_ambisense_room_time_program",
+        "set_circuit_heat_demand_limited_by_outside_temperature",
+        "set_circuit_heating_curve",
+        "set_circuit_min_flow_temperature_setpoint",
+        "set_cooling_for_days",
+        "set_cooling_setpoint",
+        "set_domestic_hot_water_circulation_time_program",
+        "set_domestic_hot_water_operation_mode",
+        "set_domestic_hot_water_temperature",
+        "set_domestic_hot_water_time_program",
+        "set_holiday",
+        "set_manual_mode_setpoint",
+        "set_set_back_temperature",
+        "set_time_controlled_cooling_setpoint",
+        "set_time_program_temperature",
+        "set_ventilation_boost",
+        "set_ventilation_fan_stage",
+        "set_ventilation_operation_mode",
+        "set_zone_operating_mode",
+        "set_zone_time_program",
+        "toggle_eebus",
+    }
+)
+
+# The parameter of each write method that holds the value, writes that only differ in it are debounced
+WRITE_METHOD_VALUE_PARAMETERS = {
+    "quick_veto_ambisense_room": "temperature",
+    "quick_veto_zone_duration": "duration_hours",
+    "quick_veto_zone_temperature": "temperature",
+    "set_ambisense_room_manual_mode_setpoint_temperature": "temperature",
+    "set_ambisense_room_operation_mode": "mode",
+    "set_ambisense_room_time_program": "time_program",
+    "set_circuit_heat_demand_limited_by_outside_temperature": "heat_demand_limited_by_outside_temperature",
+    "set_circuit_heating_curve": "heating_curve",
+    "set_circuit_min_flow_temperature_setpoint": "min_flow_temperature_setpoint",
+    "set_cooling_setpoint": "temperature",
+    "set_domestic_hot_water_circulation_time_program": "time_program",
+    "set_domestic_hot_water_operation_mode": "mode",
+    "set_domestic_hot_water_temperature": "temperature",
+    "set_domestic_hot_water_time_program": "time_program",
+    "set_manual_mode_setpoint": "temperature",
+    "set_set_back_temperature": "temperature",
+    "set_time_controlled_cooling_setpoint": "temperature",
+    "set_time_program_temperature": "temperature",
+    "set_ventilation_fan_stage": "maximum_fan_stage",
+    "set_ventilation_operation_mode": "mode",
+    "set_zone_operating_mode": "mode",
+    "set_zone_time_program": "time_program",
+    "toggle_eebus": "enabled",
+}
+
+
+@dataclass(frozen=True)
+class WriteOperation:
+    """
+    A call of a write method of `MyPyllantAPI`, with the target (zone, room, circuit, etc.) as first argument
+
+    Parameters:
+        method: Name of the method, i.e. `set_manual_mode_setpoint`. Only the methods in `WRITE_METHODS`
+            are allowed
+        target: The zone, ambisense room, domestic hot water, circuit, ventilation or system to change
+        args: Further positional arguments of the method
+        kwargs: Keyword arguments of the method
+
+    Examples:
+        >>> WriteOperation("quick_veto_zone_temperature", zone, kwargs={"temperature": 21})
+    """
+
+    method: str
+    target: Any
+    args: tuple = ()
+    kwargs: Mapping[str, Any] = field(default_factory=dict)
+
+    @property
+    def target_key(self) -> tuple:
+        """
+        Identifies the target, operations on the same target are applied in order
+        """
+        if isinstance(self.target, System):
+            return ("System", self.target.id)
+        system_id = getattr(self.target, "system_id", None)
+        index = getattr(self.target, "index", getattr(self.target, "room_index", None))
+        if system_id is None:
+            return ("object", id(self.target))
+        return (type(self.target).__name__, system_id, index)
+
+
+@dataclass
+class WriteResult:
+    operation: WriteOperation
+    result: Any = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _get_write_method(api: MyPyllantAPI, name: str) -> Callable[..., Awaitable[Any]]:
+    method = getattr(api, name, None)
+    if name not in WRITE_METHODS or not inspect.iscoroutinefunction(method):
+        raise ValueError(f"Unknown write method {name}")
+    return method
+
+
+async def _call(api: MyPyllantAPI, operation: WriteOperation) -> Any:
+    method = _get_write_method(api, operation.method)
+    return await method(operation.target, *operation.args, **operation.kwargs)
+
+
+async def apply_writes(
+    api: MyPyllantAPI,
+    operations: Iterable[WriteOperation],
+    max_concurrent_targets: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+) -> list[WriteResult]:
+    """
+    Applies write operations concurrently across targets, and in the given order for each target
+
+    A failing operation doesn't stop the others, its error is returned in its result.
+
+    Parameters:
+        api: The logged in API
+        operations: The operations to apply
+        max_concurrent_targets: How many targets are changed at the same time
+
+    Returns:
+        One result per operation, in the order of `operations`
+    """
+    operations = list(operations)
+    for operation in operations:
+        _get_write_method(api, operation.method)
+
+    results = [WriteResult(operation) for operation in operations]
+    by_target: dict[tuple, list[WriteResult]] = {}
+    for result in results:
+        by_target.setdefault(result.operation.target_key, []).append(result)
+
+    async def apply_target(target_results: list[WriteResult]):
+        for result in target_results:
+            operation = result.operation
+            try:
+                result.result = await _call(api, operation)
+            except Exception as e:
+                logger.warning(
+                    "Couldn't apply %s to %s", operation.method, operation.target_key
+                )
+                result.error = e
+
+    await gather_limited(
+        (apply_target(target_results) for target_results in by_target.values()),
+        max_concurrent_targets,
+    )
+    return results
+
+
+@dataclass
+class _PendingWrite:
+    operation: WriteOperation
+    future: asyncio.Future
+    timer: asyncio.TimerHandle | None = None
+
+
+class WriteDebouncer:
+    """
+    Collapses bursts of writes to the same target and method into one request with the last value
+
+    Writes are collapsed if they have the same target, method and arguments, except for the value
+    (i.e. the temperature, see `WRITE_METHOD_VALUE_PARAMETERS`). Arguments are compared by name, so
+    passing them positionally or as keywords makes no difference.
+    The first write starts a window of `delay` seconds. Writes within the window replace the pending one,
+    and all of their callers get the result (or error) of the request sent when the window ends.
+    Writes to the same target and method are sent in order, one at a time.
+
+    Parameters:
+        api: The logged in API
+        delay: Length of the window in seconds
+
+    Examples:
+        >>> debouncer = WriteDebouncer(api)
+        >>> await debouncer.write("set_domestic_hot_water_temperature", dhw, slider_value)
+    """
+
+    def __init__(
+        self, api: MyPyllantAPI, delay: float = DEFAULT_WRITE_DEBOUNCE_DELAY
+    ) -> None:
+        self.api = api
+        self.delay = delay
+        self.debounced_count = 0
+        self._pending: dict[tuple, _PendingWrite] = {}
+        self._locks: dict[tuple, asyncio.Lock] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def __aenter__(self) -> WriteDebouncer:
+        return self
+
+    async def __aexit__(self, *args, **kwargs) -> None:
+        await self.flush()
+
+    async def write(self, method: str, target: Any, *args, **kwargs) -> Any:
+        return await self.apply(WriteOperation(method, target, args, kwargs))
+
+    async def apply(self, operation: WriteOperation) -> Any:
+        """
+        Queues a write operation and returns its result once the window of its target and method ends
+        """
+        key = self._get_key(operation)
+        pending = self._pending.get(key)
+        if pending is None:
+            loop = asyncio.get_running_loop()
+            pending = _PendingWrite(operation, loop.create_future())
+            # Keeps asyncio from warning about errors of callers that were cancelled
+            pending.future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            pending.timer = loop.call_later(self.delay, self._send, key)
+            self._pending[key] = pending
+        else:
+            pending.operation = operation
+            self.debounced_count += 1
+        return await asyncio.shield(pending.future)
+
+    def _get_key(self, operation: WriteOperation) -> tuple:
+        _get_write_method(self.api, operation.method)
+        # Signature of the class, because the method of the instance might be wrapped or mocked
+        signature = inspect.signature(getattr(type(self.api), operation.method))
+        bound = signature.bind(
+            self.api, operation.target, *operation.args, **operation.kwargs
+        )
+        bound.apply_defaults()
+        # Skips self and the target, which is part of the key already
+        other_arguments = list(bound.arguments.items())[2:]
+        value_parameter = WRITE_METHOD_VALUE_PARAMETERS.get(operation.method)
+        other_arguments = [(k, v) for k, v in other_arguments if k != value_parameter]
+        return (operation.target_key, operation.method, repr(other_arguments))
+
+    def _send(self, key: tuple):
+        pending = self._pending.pop(key)
+        if pending.timer:
+            pending.timer.cancel()
+        task = asyncio.create_task(self._send_pending(key, pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send_pending(self, key: tuple, pending: _PendingWrite):
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            try:
+                result = await _call(self.api, pending.operation)
+            except Exception as e:
+                pending.future.set_exception(e)
+            else:
+                pending.future.set_result(result)
+
+    async def flush(self):
+        """
+        Sends all pending writes now and waits until they are done
+        """
+        for key in list(self._pending):
+            self._send(key)
+        await asyncio.gather(*self._tasks, return_exceptions=True)